@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for email rendering.
+Times the original EmailService's send_appointment_confirmation (copied unchanged below as the
+baseline, Resend call stubbed out) against the current render_appointment_confirmation on its own
+and against the current send path, which wraps it in a coroutine. The emails differ only in that the templates HTML-escape customer input (the
+sample's notes contain markup) and leave out an unused CSS rule.
+Run with: python bench_email_templates.py [--iterations 20000]
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict
+
+from services.email_service import EmailService
+
+SAMPLE_APPOINTMENT = {
+    "id": "3f6c2a8e-4b1d-4d8e-9a57-2c1e8b7d9f10",
+    "customer": {
+        "name": "Jean Mugisha",
+        "email": "jean@example.com",
+        "phone": "+250788123456",
+        "country": "Rwanda",
+    },
+    "appointment": {
+        "date": "2026-03-12",
+        "time": "10:30",
+        "appointment_type": "in_person",
+        "location": None,
+        "worker": "Olivier",
+        "service_type": "visa_consultation",
+        "duration": 60,
+        "notes": "Student visa for Canada <fall intake>",
+    },
+    "created_at": "2026-03-01T09:15:00+02:00",
+}
+
+
+class OriginalEmailService:
+    """send_appointment_confirmation exactly as EmailService had it before the templates; sending is stubbed"""
+
+    reply_to_email = 'info@cardxacademia.com'
+
+    def _send_email(self, to, subject, html_content, reply_to=None, cc=None) -> bool:
+        self.sent = (subject, html_content)
+        return True
+
+    def send_appointment_confirmation(self, appointment_data: Dict) -> bool:
+        """Send confirmation email to customer after appointment booking"""
+        customer_name = appointment_data.get('customer', {}).get('name', 'Valued Customer')
+        customer_email = appointment_data.get('customer', {}).get('email')
+        appointment_date = appointment_data.get('appointment', {}).get('date')
+        appointment_time = appointment_data.get('appointment', {}).get('time')
+        appointment_type = appointment_data.get('appointment', {}).get('appointment_type', 'in_person')
+        location = appointment_data.get('appointment', {}).get('location', '')
+        worker = appointment_data.get('appointment', {}).get('worker', '')
+        service_type = appointment_data.get('appointment', {}).get('service_type', 'Consultation')
+        duration = appointment_data.get('appointment', {}).get('duration', 30)
+        notes = appointment_data.get('appointment', {}).get('notes', '')
+        
+        # Format service type for display
+        service_display = service_type.replace('_', ' ').title()
+        
+        # Format date for display
+        try:
+            if isinstance(appointment_date, str):
+                date_obj = datetime.fromisoformat(appointment_date.replace('Z', '+00:00'))
+            else:
+                date_obj = appointment_date
+            formatted_date = date_obj.strftime('%B %d, %Y')
+        except:
+            formatted_date = str(appointment_date)
+        
+        html_content = f"""
+<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <style>
+    body {{
+      font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
+      line-height: 1.6;
+      color: #333;
+      max-width: 600px;
+      margin: 0 auto;
+      padding: 20px;
+      background-color: #f4f4f4;
+    }}
+    .container {{
+      background-color: #ffffff;
+      border-radius: 8px;
+      overflow: hidden;
+      box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }}
+    .header {{
+      background: linear-gradient(135deg, #14B8A6 0%, #0D9488 100%);
+      color: white;
+      padding: 30px 20px;
+      text-align: center;
+    }}
+    .header h1 {{
+      margin: 0;
+      font-size: 28px;
+      font-weight: 600;
+    }}
+    .content {{
+      padding: 30px 20px;
+    }}
+    .greeting {{
+      font-size: 16px;
+      margin-bottom: 20px;
+    }}
+    .appointment-details {{
+      background-color: #f8f9fa;
+      border-left: 4px solid #14B8A6;
+      padding: 20px;
+      margin: 25px 0;
+      border-radius: 4px;
+    }}
+    .appointment-details h3 {{
+      margin-top: 0;
+      color: #14B8A6;
+      font-size: 18px;
+    }}
+    .detail-row {{
+      margin: 12px 0;
+      display: flex;
+      align-items: center;
+    }}
+    .detail-label {{
+      font-weight: 600;
+      color: #555;
+      min-width: 120px;
+    }}
+    .detail-value {{
+      color: #333;
+    }}
+    .location {{
+      background-color: #f8f9fa;
+      padding: 15px;
+      border-radius: 4px;
+      margin: 20px 0;
+    }}
+    .contact-info {{
+      margin-top: 25px;
+      padding-top: 20px;
+      border-top: 1px solid #e0e0e0;
+    }}
+    .contact-info p {{
+      margin: 8px 0;
+      color: #666;
+    }}
+    .footer {{
+      background-color: #f8f9fa;
+      padding: 20px;
+      text-align: center;
+      color: #666;
+      font-size: 12px;
+    }}
+    .button {{
+      display: inline-block;
+      background-color: #14B8A6;
+      color: white;
+      padding: 12px 24px;
+      text-decoration: none;
+      border-radius: 6px;
+      margin-top: 20px;
+      font-weight: 500;
+    }}
+  </style>
+</head>
+<body>
+  <div class="container">
+    <div class="header">
+      <h1>✓ Appointment Confirmed</h1>
+    </div>
+    <div class="content">
+      <div class="greeting">
+        <p>Dear {customer_name},</p>
+        <p>Thank you for booking an appointment with <strong>CardX Academia</strong>. Your appointment has been successfully confirmed!</p>
+      </div>
+      
+      <div class="appointment-details">
+        <h3>Appointment Details</h3>
+        <div class="detail-row">
+          <span class="detail-label">Date:</span>
+          <span class="detail-value">{formatted_date}</span>
+        </div>
+        <div class="detail-row">
+          <span class="detail-label">Time:</span>
+          <span class="detail-value">{appointment_time}</span>
+        </div>
+        <div class="detail-row">
+          <span class="detail-label">Service:</span>
+          <span class="detail-value">{service_display}</span>
+        </div>
+        <div class="detail-row">
+          <span class="detail-label">Duration:</span>
+          <span class="detail-value">{duration} minutes</span>
+        </div>
+        <div class="detail-row">
+          <span class="detail-label">Type:</span>
+          <span class="detail-value">{'In-Person Meeting' if appointment_type == 'in_person' else 'Virtual Meeting (Online)'}</span>
+        </div>
+        {f'<div class="detail-row"><span class="detail-label">Consultant:</span><span class="detail-value">{worker}</span></div>' if worker else ''}
+        {f'<div class="detail-row"><span class="detail-label">Notes:</span><span class="detail-value">{notes}</span></div>' if notes else ''}
+      </div>
+      
+      {f'''
+      <div class="location">
+        <h3 style="margin-top: 0; color: #14B8A6;">📍 Meeting Location</h3>
+        <p style="margin: 5px 0;"><strong>CardX Academia</strong><br>
+        {location if location else '1st Floor, Door F1B-013D<br>Town Center Building (TCB)<br>Kigali City, Rwanda'}</p>
+      </div>
+      ''' if appointment_type == 'in_person' else '''
+      <div class="location">
+        <h3 style="margin-top: 0; color: #14B8A6;">💻 Virtual Meeting</h3>
+        <p style="margin: 5px 0;">This is a virtual appointment. You will receive a meeting link via email before your appointment time.</p>
+      </div>
+      '''}
+      
+      <div class="contact-info">
+        <p><strong>Need to reschedule or cancel?</strong></p>
+        <p>Please contact us at:</p>
+        <p>📧 Email: <a href="mailto:info@cardxacademia.com" style="color: #14B8A6;">info@cardxacademia.com</a></p>
+        <p>📞 Phone: <a href="tel:+250788603451" style="color: #14B8A6;">+250 788 603 451</a></p>
+      </div>
+      
+      <p style="margin-top: 25px;">We look forward to meeting you and helping you achieve your goals!</p>
+      <p>Best regards,<br><strong>The CardX Academia Team</strong></p>
+    </div>
+    <div class="footer">
+      <p>© 2024 CardX Academia. All rights reserved.</p>
+      <p>This is an automated confirmation email. Please do not reply directly to this message.</p>
+    </div>
+  </div>
+</body>
+</html>
+        """
+        
+        subject = f"Appointment Confirmed - {formatted_date} at {appointment_time}"
+        
+        return self._send_email(
+            to=customer_email,
+            subject=subject,
+            html_content=html_content,
+            reply_to=self.reply_to_email
+        )
+
+
+class TemplateEmailService(EmailService):
+    """The current EmailService with sending stubbed"""
+
+    async def _send_email(self, to, subject, html_content, reply_to=None, cc=None) -> bool:
+        self.sent = (subject, html_content)
+        return True
+
+
+def run_sync(coroutine):
+    """Drive a coroutine that never suspends (the stubbed send) without an event loop"""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine suspended")
+
+
+def measure(render, iterations):
+    """Return renders per second and peak bytes allocated for a single render"""
+    render()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    samples = []
+    for _ in range(200):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        render()
+        samples.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    samples.sort()
+
+    return {
+        "iterations": iterations,
+        "renders_per_second": round(iterations / elapsed),
+        "microseconds_per_render": round(elapsed / iterations * 1_000_000, 2),
+        "bytes_allocated_per_render": samples[len(samples) // 2],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    original = OriginalEmailService()
+    current = TemplateEmailService()
+    results = {
+        "original_fstring": measure(lambda: original.send_appointment_confirmation(SAMPLE_APPOINTMENT), args.iterations),
+        "current_render": measure(lambda: current.render_appointment_confirmation(SAMPLE_APPOINTMENT), args.iterations),
+        "current_send": measure(
+            lambda: run_sync(current.send_appointment_confirmation(SAMPLE_APPOINTMENT)), args.iterations
+        ),
+    }
+    # The original rendered inside a synchronous send; the current send is a coroutine, which adds its own cost
+    baseline = results["original_fstring"]["renders_per_second"]
+    results["render_speedup"] = round(results["current_render"]["renders_per_second"] / baseline, 2)
+    results["send_speedup"] = round(results["current_send"]["renders_per_second"] / baseline, 2)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
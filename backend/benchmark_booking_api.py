@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Load test and benchmark for the booking API.
+Boots server:app in-process against a local Mongo stand-in with a stubbed Resend transport, drives a
+mixed workload (slot lookups, bookings, cancellations, pilgrimage signups) at a fixed concurrency and
+reports throughput, p50/p95/p99 latency and error rates as JSON that can be compared between commits.
+Run with: python benchmark_booking_api.py [--duration 30] [--concurrency 20] [--mix slots=60,book=20,cancel=10,pilgrimage=10]
+          [--mongo mock | --mongo mongodb://localhost:27017] [--output bench.json] [--compare baseline.json]
+--mongo mock (the default) uses mongomock-motor, so no database is needed; numbers from it measure the
+application code only. Against a real mongod the benchmark uses a throwaway database that is dropped afterwards.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+SERVICE_TYPES = ["visa_consultation", "admission_guidance", "general_inquiry", "work_permit", "express_entry"]
+WORKERS = [None, "Olivier", "Aline", "Eric"]
+OPERATIONS = ("slots", "book", "cancel", "pilgrimage")
+DEFAULT_MIX = "slots=60,book=20,cancel=10,pilgrimage=10"
+
+# Booking days span this many weekdays, so slot conflicts stay realistic instead of saturating one day
+BOOKING_DAYS = 20
+
+
+def parse_mix(value):
+    """'slots=60,book=20' -> {'slots': 60.0, 'book': 20.0}"""
+    mix = {}
+    for part in value.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r} (expected one of {', '.join(OPERATIONS)})")
+        mix[name] = float(weight)
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("the mix needs at least one operation with a positive weight")
+    return mix
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class StubResend:
+    """Stands in for ResendTransport: accepts every email after a fixed delay and counts what it was sent"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.sent = 0
+        self.batches = 0
+        self._ids = itertools.count(1)
+
+    async def send(self, params):
+        await asyncio.sleep(self.latency)
+        self.sent += 1
+        return {"id": f"bench_{next(self._ids)}"}
+
+    async def send_batch(self, messages):
+        await asyncio.sleep(self.latency)
+        self.sent += len(messages)
+        self.batches += 1
+        return {"data": [{"id": f"bench_{next(self._ids)}"} for _ in messages]}
+
+    async def aclose(self):
+        pass
+
+
+class Workload:
+    """Builds requests for each operation and remembers created appointments for later cancellations"""
+
+    def __init__(self, rng, mix):
+        self.rng = rng
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.booked = []
+        self.sequence = itertools.count(1)
+        start = date.today() + timedelta(days=30)
+        self.days = [day for day in (start + timedelta(days=i) for i in range(BOOKING_DAYS * 2)) if day.weekday() < 5]
+        self.days = self.days[:BOOKING_DAYS]
+        self.times = [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(9 * 60, 17 * 60, 30)]
+
+    def next_operation(self):
+        name = self.rng.choices(self.operations, self.weights)[0]
+        if name == "cancel" and not self.booked:
+            # Nothing to cancel yet; book instead so the mix fills the calendar first
+            return "book"
+        return name
+
+    def request(self, name):
+        """(method, path, json body) for one request of the given operation"""
+        n = next(self.sequence)
+        if name == "slots":
+            day = self.rng.choice(self.days).isoformat()
+            service = self.rng.choice(SERVICE_TYPES)
+            return "GET", f"/api/appointments/available-slots?date_str={day}&service_type={service}", None
+        if name == "book":
+            return "POST", "/api/appointments", {
+                "customer": {"name": f"Bench Client {n}", "email": f"bench{n}@example.com", "phone": "+250788123456"},
+                "appointment": {
+                    "date": self.rng.choice(self.days).isoformat(),
+                    "time": self.rng.choice(self.times),
+                    "duration": self.rng.choice([30, 30, 60]),
+                    "service_type": self.rng.choice(SERVICE_TYPES),
+                    "worker": self.rng.choice(WORKERS),
+                    "notes": "benchmark booking",
+                },
+            }
+        if name == "cancel":
+            appointment_id = self.booked.pop(self.rng.randrange(len(self.booked)))
+            return "PATCH", f"/api/appointments/{appointment_id}/cancel", None
+        return "POST", "/api/pilgrimage-bookings", {
+            "customer": {"fullName": f"Bench Pilgrim {n}", "email": f"pilgrim{n}@example.com", "phone": "+250788123456",
+                         "country": "Rwanda", "passportNumber": f"PC{n:07d}"},
+            "booking": {"churchName": "Benchmark Parish", "emergencyContactName": "Contact", "emergencyContactPhone": "+250788000000"},
+        }
+
+
+def is_error(name, status):
+    """Anything but the expected status is an error; only bookings may fail, with a slot conflict (400).
+
+    Each cancellation targets a different appointment this run booked, so it must succeed.
+    """
+    if not isinstance(status, int):
+        return True
+    if status >= 500:
+        return True
+    expected = {"slots": {200}, "book": {201, 400}, "cancel": {200}, "pilgrimage": {201}}
+    return status not in expected[name]
+
+
+async def run_load(http, workload, concurrency, deadline, max_requests):
+    """Closed loop: each virtual user sends its next request as soon as the previous one finishes"""
+    samples = {name: [] for name in OPERATIONS}
+    issued = itertools.count()
+
+    async def user():
+        while time.perf_counter() < deadline:
+            if max_requests and next(issued) >= max_requests:
+                return
+            name = workload.next_operation()
+            method, path, body = workload.request(name)
+            started = time.perf_counter()
+            try:
+                response = await http.request(method, path, json=body)
+                status = response.status_code
+            except Exception as e:
+                status = type(e).__name__
+                response = None
+            elapsed = time.perf_counter() - started
+            samples[name].append((elapsed, status))
+            if name == "book" and status == 201:
+                workload.booked.append(response.json()["id"])
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return samples
+
+
+def summarize(results, wall_seconds):
+    """Latency percentiles, throughput and error rate for (operation, seconds, status) samples"""
+    latencies = sorted(seconds * 1000 for _, seconds, _ in results)
+    errors = sum(1 for name, _, status in results if is_error(name, status))
+    count = len(results)
+    return {
+        "requests": count,
+        "throughput_rps": round(count / wall_seconds, 2) if wall_seconds else 0.0,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "latency_ms": {
+            "p50": _round(percentile(latencies, 0.50)),
+            "p95": _round(percentile(latencies, 0.95)),
+            "p99": _round(percentile(latencies, 0.99)),
+            "mean": _round(sum(latencies) / count) if count else None,
+            "max": _round(latencies[-1]) if latencies else None,
+        },
+        "status_codes": dict(sorted(Counter(str(status) for *_, status in results).items())),
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+def build_report(samples, wall_seconds, settings, stub, outbox):
+    operations = {}
+    combined = []
+    for name in OPERATIONS:
+        named = [(name, seconds, status) for seconds, status in samples[name]]
+        if named:
+            operations[name] = summarize(named, wall_seconds)
+            combined.extend(named)
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **settings,
+        },
+        "overall": summarize(combined, wall_seconds),
+        "operations": operations,
+        "emails": {"accepted_by_stub": stub.sent, "batch_requests": stub.batches, "outbox_jobs": outbox},
+    }
+
+
+def compare(report, baseline):
+    """Print current vs baseline for throughput, p50/p95/p99 and error rate, per operation"""
+    print(f"\nComparison with {baseline['meta'].get('commit') or 'baseline'} "
+          f"(now {report['meta'].get('commit') or 'working tree'}):")
+    differing = [key for key in ("mongo", "concurrency", "mix", "resend_latency_ms")
+                 if report["meta"].get(key) != baseline["meta"].get(key)]
+    if differing:
+        print(f"  warning: runs used different settings ({', '.join(differing)}); numbers are not directly comparable")
+    print(f"  {'operation':<12}{'metric':<16}{'baseline':>12}{'current':>12}{'change':>10}")
+    sections = [("overall", report["overall"], baseline.get("overall"))]
+    sections += [(name, stats, baseline.get("operations", {}).get(name)) for name, stats in report["operations"].items()]
+    for name, current, before in sections:
+        if not before:
+            print(f"  {name:<12}(not in baseline)")
+            continue
+        rows = [("throughput_rps", current["throughput_rps"], before["throughput_rps"])]
+        rows += [(f"{key} ms", current["latency_ms"][key], before["latency_ms"][key]) for key in ("p50", "p95", "p99")]
+        rows.append(("error_rate", current["error_rate"], before["error_rate"]))
+        for metric, now, then in rows:
+            change = f"{(now - then) / then * 100:+.1f}%" if now is not None and then else "-"
+            print(f"  {name:<12}{metric:<16}{_fmt(then):>12}{_fmt(now):>12}{change:>10}")
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:g}"
+
+
+async def outbox_status(db):
+    """Outbox jobs by status once the run has drained, e.g. {'sent': 120, 'pending': 3}"""
+    from services.email_outbox import OUTBOX_COLLECTION
+
+    counts = Counter()
+    async for job in db[OUTBOX_COLLECTION].find({}, {"_id": 0, "status": 1}):
+        counts[job.get("status")] += 1
+    return dict(sorted(counts.items()))
+
+
+async def connect(server, mongo):
+    """Point the app at the chosen Mongo stand-in, as the startup connect would"""
+    if mongo == "mock":
+        from mock_mongo import connect_mock
+
+        await connect_mock(server)
+        return True
+    return await server.connect_to_mongodb(max_retries=1, retry_delay=0)
+
+
+async def benchmark(args):
+    # Configure the app before it is imported: quiet logs, a throwaway database, no tracing
+    os.environ["LOG_LEVEL"] = os.environ.get("BENCH_LOG_LEVEL", "WARNING")
+    os.environ["TRACE_EXPORTER"] = "none"
+    os.environ["DB_NAME"] = f"cardx_bench_{os.getpid()}"
+    os.environ["RESEND_API_KEY"] = "re_benchmark"
+    os.environ.setdefault("ADMIN_EMAIL", "admin@example.com")
+    if args.mongo != "mock":
+        os.environ["MONGO_URL"] = args.mongo
+
+    import httpx
+    import server
+
+    stub = StubResend(args.resend_latency_ms / 1000)
+    server.email_service.client = stub
+    if server.email_service.batcher is not None:
+        server.email_service.batcher.transport = stub
+
+    if not await connect(server, args.mongo):
+        print(f"Could not connect to MongoDB at {args.mongo}")
+        return None
+
+    rng = random.Random(args.seed)
+    workload = Workload(rng, args.mix)
+    settings = {
+        "mongo": "mongomock-motor" if args.mongo == "mock" else "mongod",
+        "concurrency": args.concurrency,
+        "duration_seconds": args.duration,
+        "max_requests": args.requests,
+        "warmup_seconds": args.warmup,
+        "mix": args.mix,
+        "resend_latency_ms": args.resend_latency_ms,
+        "seed": args.seed,
+        "loop_watchdog": server.LOOP_WATCHDOG_ENABLED,
+    }
+
+    server.email_dispatcher.start()
+    if server.LOOP_WATCHDOG_ENABLED:
+        server.loop_watchdog.start()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as http:
+            if args.warmup > 0:
+                print(f"Warming up for {args.warmup:g}s...")
+                await run_load(http, workload, args.concurrency, time.perf_counter() + args.warmup, 0)
+
+            limit = f"{args.requests} requests" if args.requests else f"{args.duration:g}s"
+            print(f"Running {limit} at concurrency {args.concurrency} ({settings['mongo']}, mix {args.mix})...")
+            started = time.perf_counter()
+            deadline = started + (args.duration if not args.requests else float("inf"))
+            samples = await run_load(http, workload, args.concurrency, deadline, args.requests)
+            wall_seconds = time.perf_counter() - started
+        # Let the outbox drain so the report shows whether email sending kept up with the bookings
+        drain_deadline = time.perf_counter() + args.drain
+        outbox = await outbox_status(server.db)
+        while (outbox.get("pending") or outbox.get("sending")) and time.perf_counter() < drain_deadline:
+            await asyncio.sleep(0.5)
+            outbox = await outbox_status(server.db)
+    finally:
+        server.loop_watchdog.stop()
+        await server.email_dispatcher.stop()
+        await server.email_service.aclose()
+        if args.mongo != "mock" and server.client is not None:
+            await server.client.drop_database(server.db_name)
+            server.client.close()
+
+    return build_report(samples, wall_seconds, settings, stub, outbox)
+
+
+def print_summary(report):
+    print(f"\n  {'operation':<12}{'requests':>10}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    rows = [("overall", report["overall"])] + list(report["operations"].items())
+    for name, stats in rows:
+        latency = stats["latency_ms"]
+        print(f"  {name:<12}{stats['requests']:>10}{stats['throughput_rps']:>10}{_fmt(latency['p50']):>10}"
+              f"{_fmt(latency['p95']):>10}{_fmt(latency['p99']):>10}{stats['errors']:>8}")
+    emails = report["emails"]
+    print(f"  emails accepted by the stub: {emails['accepted_by_stub']}, outbox jobs: {emails['outbox_jobs']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed-workload benchmark for the booking API")
+    parser.add_argument("--mongo", default="mock", help="'mock' for mongomock-motor, or a mongodb:// URL")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds (ignored with --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests instead of --duration")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before the run")
+    parser.add_argument("--drain", type=float, default=10.0, help="at most this many seconds to let the email outbox drain afterwards")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--resend-latency-ms", type=float, default=80.0, help="simulated Resend response time")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report to this file (default: print it)")
+    parser.add_argument("--compare", help="baseline JSON report from an earlier run to compare against")
+    parser.add_argument("--max-error-rate", type=float, default=0.0, help="exit 1 if the overall error rate is higher")
+    args = parser.parse_args()
+
+    report = asyncio.run(benchmark(args))
+    if report is None:
+        sys.exit(2)
+
+    print_summary(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"\nReport written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            compare(report, json.load(handle))
+
+    sys.exit(0 if report["overall"]["error_rate"] <= args.max_error_rate else 1)
+
+
+if __name__ == "__main__":
+    main()
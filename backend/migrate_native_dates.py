@@ -0,0 +1,103 @@
+"""
+One-off migration: convert ISO-string dates to native BSON dates
+Documents written before the codec layer stored dates as strings; range queries and indexes need BSON dates.
+Run with: python migrate_native_dates.py [--dry-run] [--batch-size 500]
+Safe to re-run: only fields that are still strings are touched.
+"""
+import os
+import argparse
+import asyncio
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from services.codec import from_bson_date, to_bson_date
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# Date-only fields become midnight UTC, like DocumentCodec.encode
+DATE_FIELDS = {
+    "appointments": ["appointment.date"],
+    "slot_reservations": ["date"],
+}
+
+DATETIME_FIELDS = {
+    "appointments": ["created_at", "updated_at", "confirmed_at", "cancelled_at", "completed_at"],
+    "pilgrimage_bookings": ["created_at", "updated_at"],
+    "status_checks": ["timestamp"],
+}
+
+
+def parse_datetime(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    # Naive strings were written from datetime.now(timezone.utc) or Kigali-aware values; treat naive as UTC
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def lookup(doc, path):
+    for key in path.split('.'):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(key)
+    return doc
+
+
+async def migrate_collection(db, name, batch_size, dry_run):
+    date_fields = DATE_FIELDS.get(name, [])
+    datetime_fields = DATETIME_FIELDS.get(name, [])
+    fields = date_fields + datetime_fields
+    query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+
+    converted, failed, batch = 0, 0, []
+    async for doc in db[name].find(query, projection):
+        update = {}
+        for field in fields:
+            value = lookup(doc, field)
+            if not isinstance(value, str):
+                continue
+            try:
+                update[field] = to_bson_date(from_bson_date(value)) if field in date_fields else parse_datetime(value)
+            except ValueError:
+                failed += 1
+                print(f"  ⚠️ {name} {doc['_id']}: cannot parse {field}={value!r}")
+        if not update:
+            continue
+        converted += 1
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+        if len(batch) >= batch_size:
+            if not dry_run:
+                await db[name].bulk_write(batch, ordered=False)
+            batch = []
+    if batch and not dry_run:
+        await db[name].bulk_write(batch, ordered=False)
+
+    print(f"  {'Would convert' if dry_run else 'Converted'} {converted} documents in {name}" + (f", {failed} unparseable fields" if failed else ""))
+    return converted
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Convert string dates to native BSON dates")
+    parser.add_argument("--dry-run", action="store_true", help="Only count documents that would change")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    mongo_url = (os.environ.get('MONGO_URL') or os.environ.get('MONGODB_URI') or 'mongodb://localhost:27017').strip()
+    db_name = os.environ.get('DB_NAME', 'cardxacademia')
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=20000)
+    db = client[db_name]
+
+    print(f"🔄 Migrating string dates in {db_name}{' (dry run)' if args.dry_run else ''}...")
+    total = 0
+    for name in sorted(set(DATE_FIELDS) | set(DATETIME_FIELDS)):
+        total += await migrate_collection(db, name, args.batch_size, args.dry_run)
+    print(f"✅ Done: {total} documents {'need conversion' if args.dry_run else 'converted'}")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
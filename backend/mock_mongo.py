@@ -0,0 +1,39 @@
+"""
+Mock MongoDB
+Points the app at an in-memory mongomock-motor database for the in-process tests and the load test
+"""
+from mongomock import MongoClient
+from mongomock.collection import Collection
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import OperationFailure
+
+_find_and_modify = Collection._find_and_modify
+
+# What a standalone mongod answers when a transaction is started
+ILLEGAL_OPERATION = 20
+
+
+def _find_and_modify_then_project(self, query, projection=None, *args, **kwargs):
+    # Unless the projection keeps _id, mongomock re-reads the updated document with the original filter,
+    # so find_one_and_update(..., return_document=AFTER) returns None whenever the update changes a field
+    # the filter matched on (every status transition). Work on whole documents and project afterwards.
+    document = _find_and_modify(self, query, None, *args, **kwargs)
+    if document is None or projection is None:
+        return document
+    return self._copy_only_fields(document, dict(projection), dict)
+
+
+def _start_session_like_standalone(self, *args, **kwargs):
+    # mongomock raises NotImplementedError; answer like a standalone server so the app takes its
+    # non-transactional outbox path, as it would in production without a replica set
+    raise OperationFailure("Transaction numbers are only allowed on a replica set member or mongos", ILLEGAL_OPERATION)
+
+
+async def connect_mock(server):
+    """Connect `server` to a fresh in-memory database with its indexes, as the startup connect would"""
+    Collection._find_and_modify = _find_and_modify_then_project
+    MongoClient.start_session = _start_session_like_standalone
+    server.client = AsyncMongoMockClient(tz_aware=True, tzinfo=server.KIGALI_TZ)
+    server.db = server.client[server.db_name]
+    await server.index_manager.ensure(server.db)
+    server.db_ready.set()
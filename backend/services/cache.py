@@ -0,0 +1,97 @@
+"""
+In-process TTL + LRU Cache
+Entries are grouped (e.g. by date) so a write can invalidate exactly the entries it affects
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+
+class TTLCache:
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 60.0,
+        group_of: Callable[[Hashable], Hashable] = lambda key: key[0],
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.group_of = group_of
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._groups: Dict[Hashable, Set[Hashable]] = {}
+        # Bumped on every invalidation so a read that started before a write cannot store its stale result
+        self._generations: Dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def generation(self, key: Hashable) -> int:
+        """Current generation of the key's group; pass it back to set()"""
+        return self._generations.get(self.group_of(key), 0)
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """Store a value unless its group was invalidated since `generation` was read"""
+        group = self.group_of(key)
+        if generation is not None and generation != self._generations.get(group, 0):
+            return
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._groups.setdefault(group, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate_group(self, group: Hashable) -> int:
+        """Drop every entry of a group (e.g. all cached lookups for one date)"""
+        self._generations[group] = self._generations.get(group, 0) + 1
+        keys = self._groups.pop(group, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        self.invalidations += 1
+        return len(keys)
+
+    def clear(self):
+        for group in list(self._groups):
+            self.invalidate_group(group)
+
+    def _remove(self, key: Hashable):
+        self._entries.pop(key, None)
+        group = self.group_of(key)
+        keys = self._groups.get(group)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._groups[group]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,114 @@
+"""
+Document Codec
+Converts between Pydantic models and MongoDB documents, storing dates and datetimes as native BSON dates
+"""
+import types
+import typing
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel
+
+Path = Tuple[str, ...]
+
+
+def to_bson_date(value: date) -> datetime:
+    """Calendar date -> midnight UTC, the BSON representation used for date-only fields and their queries"""
+    return datetime(value.year, value.month, value.day, tzinfo=timezone.utc)
+
+
+def from_bson_date(value: Any) -> date:
+    """Stored date (BSON datetime, or a legacy 'YYYY-MM-DD' string) -> calendar date"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value[:10])
+
+
+def date_range_query(field: str, first: date, last: Optional[date] = None) -> Dict:
+    """Filter for a date-only field within [first, last] (open-ended without `last`).
+
+    Also matches legacy ISO strings: until migrate_native_dates.py has run, older bookings keep them,
+    and a BSON-date bound alone would hide those bookings from availability and double-book their slots.
+    """
+    native = {"$gte": to_bson_date(first)}
+    legacy = {"$gte": first.isoformat()}
+    if last is not None:
+        native["$lte"] = to_bson_date(last)
+        # Bound strings by the next day so values with a time part ('2025-01-31T09:00:00') still match
+        legacy["$lt"] = (last + timedelta(days=1)).isoformat()
+    return {"$or": [{field: native}, {field: legacy}]}
+
+
+def unwrap_optional(annotation):
+    """Strip Optional[...] / X | None down to the single concrete type, if there is one"""
+    origin = typing.get_origin(annotation)
+    if origin is Union or origin is getattr(types, "UnionType", None):
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return args[0] if len(args) == 1 else None
+    return annotation
+
+
+def _field_paths(model: Type[BaseModel], prefix: Path = ()) -> Tuple[List[Path], List[Path]]:
+    date_paths, datetime_paths = [], []
+    for name, field in model.model_fields.items():
+        annotation = unwrap_optional(field.annotation)
+        path = prefix + (name,)
+        if annotation is datetime:
+            datetime_paths.append(path)
+        elif annotation is date:
+            date_paths.append(path)
+        elif isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            nested_dates, nested_datetimes = _field_paths(annotation, path)
+            date_paths.extend(nested_dates)
+            datetime_paths.extend(nested_datetimes)
+    return date_paths, datetime_paths
+
+
+def _convert(doc: Dict, path: Path, convert):
+    for key in path[:-1]:
+        doc = doc.get(key)
+        if not isinstance(doc, dict):
+            return
+    value = doc.get(path[-1])
+    if value is not None:
+        doc[path[-1]] = convert(value)
+
+
+class DocumentCodec:
+    """Encodes a model for insert and decodes stored documents back to model-ready dicts.
+
+    Date and datetime fields are found once from the model's annotations, so handlers
+    never convert individual fields themselves.
+    """
+
+    def __init__(self, model: Type[BaseModel], tz: tzinfo = timezone.utc):
+        self.model = model
+        self.tz = tz
+        self.date_paths, self.datetime_paths = _field_paths(model)
+
+    def encode(self, instance: BaseModel) -> Dict:
+        doc = instance.model_dump()
+        for path in self.date_paths:
+            _convert(doc, path, to_bson_date)
+        # Aware datetimes are stored by the driver as UTC BSON dates as they are
+        return doc
+
+    def decode(self, doc: Dict) -> Dict:
+        """Convert a stored document in place; legacy ISO strings are still accepted"""
+        for path in self.date_paths:
+            _convert(doc, path, from_bson_date)
+        for path in self.datetime_paths:
+            _convert(doc, path, self._decode_datetime)
+        return doc
+
+    def _decode_datetime(self, value: Any) -> datetime:
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if value.tzinfo is None:
+            # BSON dates are UTC; clients without tz_aware return them naive
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(self.tz)
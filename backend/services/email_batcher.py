@@ -0,0 +1,100 @@
+"""
+Email Batcher
+Collects outgoing emails for a short window and submits them through Resend's batch endpoint
+"""
+import os
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from services.email_transport import ResendError
+
+logger = logging.getLogger(__name__)
+
+# Resend accepts at most 100 emails per batch request
+RESEND_MAX_BATCH = 100
+
+
+class EmailBatcher:
+    def __init__(self, transport, max_batch: int = RESEND_MAX_BATCH, window: float = 0.25):
+        self.transport = transport
+        self.max_batch = max(1, min(max_batch, RESEND_MAX_BATCH))
+        self.window = window
+        self._pending: List[Tuple[Dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+    @classmethod
+    def from_env(cls, transport) -> "EmailBatcher":
+        """Build a batcher using the EMAIL_BATCH_* settings"""
+        return cls(
+            transport,
+            max_batch=int(os.environ.get('EMAIL_BATCH_MAX', str(RESEND_MAX_BATCH))),
+            window=float(os.environ.get('EMAIL_BATCH_WINDOW_MS', '250')) / 1000,
+        )
+
+    async def submit(self, params: Dict) -> Dict:
+        """Queue one email and wait for its own result from the batch it is sent in"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((params, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._send(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: List[Tuple[Dict, asyncio.Future]]):
+        messages = [params for params, _ in batch]
+        futures = [future for _, future in batch]
+        try:
+            if len(messages) == 1:
+                results = [await self.transport.send(messages[0])]
+            else:
+                logger.info("📨 Submitting batch of %s emails", len(messages))
+                response = await self.transport.send_batch(messages)
+                results = self._split_results(response, len(messages))
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _split_results(response: Dict, count: int) -> List:
+        """Map a batch response back to one result (or error) per submitted message"""
+        errors = {error.get('index'): error.get('message', 'rejected by Resend') for error in response.get('errors') or []}
+        created = iter(response.get('data') or [])
+        results = []
+        for index in range(count):
+            if index in errors:
+                results.append(ResendError(f"Batch item {index} rejected: {errors[index]}"))
+            else:
+                # Resend returns ids only for accepted messages, in submission order
+                results.append(next(created, None) or ResendError(f"No id returned for batch item {index}"))
+        return results
+
+    async def aclose(self):
+        """Send anything still queued and wait for in-flight batches"""
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
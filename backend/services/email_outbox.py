@@ -0,0 +1,288 @@
+"""
+Email Outbox
+Durable queue of booking emails, written next to the booking and drained by a background dispatcher
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from services.tracing import KIND_CLIENT, current_context, span, tracer
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_COLLECTION = "email_outbox"
+
+# Outbox email kinds mapped to the EmailService method that renders and sends them
+EMAIL_KINDS = {
+    "appointment_confirmation": "send_appointment_confirmation",
+    "appointment_admin": "send_admin_notification",
+    "pilgrimage_confirmation": "send_pilgrimage_confirmation",
+    "pilgrimage_admin": "send_pilgrimage_admin_notification",
+}
+
+# MongoDB error code returned when transactions are used on a standalone server
+ILLEGAL_OPERATION = 20
+
+
+def build_outbox_jobs(collection: str, doc: Dict, kinds: Iterable[Tuple[str, bool]]) -> List[Dict]:
+    """Build one outbox job per (kind, marks_email_sent) pair for a booking document"""
+    now = datetime.now(timezone.utc)
+    # insert_one adds an ObjectId to the document, never copy it into the payload
+    payload = {key: value for key, value in doc.items() if key != '_id'}
+    # Sends happen later in a worker; this lets them continue the booking request's trace
+    trace = current_context()
+    jobs = []
+    for kind, marks_email_sent in kinds:
+        if kind not in EMAIL_KINDS:
+            raise ValueError(f"Unknown email kind: {kind}")
+        jobs.append({
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "collection": collection,
+            "ref_id": doc["id"],
+            "payload": payload,
+            "marks_email_sent": marks_email_sent,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "locked_until": None,
+            "last_error": None,
+            "created_at": now,
+            "sent_at": None,
+            "trace": trace,
+        })
+    return jobs
+
+
+class EmailDispatcher:
+    """Bounded pool of worker tasks that claim outbox jobs and send them through EmailService.
+
+    Each worker leases up to `claim_batch` due jobs and sends them concurrently, so up to
+    workers * claim_batch emails can be waiting in the same Resend batch window.
+    """
+
+    def __init__(
+        self,
+        email_service,
+        get_client: Callable,
+        get_db: Callable,
+        workers: int = 4,
+        claim_batch: int = 10,
+        poll_interval: float = 5.0,
+        max_attempts: int = 5,
+        lease_seconds: int = 120,
+        retry_base_seconds: int = 30,
+    ):
+        self.email_service = email_service
+        self.get_client = get_client
+        self.get_db = get_db
+        self.workers = max(1, workers)
+        self.claim_batch = max(1, claim_batch)
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        # None until the first insert tells us whether the deployment supports transactions
+        self._transactions_supported: Optional[bool] = None
+
+    def jobs_for_appointment(self, doc: Dict) -> List[Dict]:
+        """Outbox jobs for a new appointment (customer confirmation + admin notification)"""
+        kinds = [("appointment_confirmation", True)]
+        if self.email_service.admin_email:
+            kinds.append(("appointment_admin", False))
+        return build_outbox_jobs("appointments", doc, kinds)
+
+    def jobs_for_pilgrimage(self, doc: Dict, notify_admin: bool = True) -> List[Dict]:
+        """Outbox jobs for a new pilgrimage booking (customer confirmation + admin notification)"""
+        kinds = [("pilgrimage_confirmation", True)]
+        if notify_admin and self.email_service.admin_email:
+            kinds.append(("pilgrimage_admin", False))
+        return build_outbox_jobs("pilgrimage_bookings", doc, kinds)
+
+    async def insert_with_outbox(self, collection: str, doc: Dict, jobs: List[Dict]):
+        """Insert a booking and its outbox jobs, atomically when the deployment supports transactions"""
+        db = self.get_db()
+        client = self.get_client()
+
+        if self._transactions_supported is not False:
+            try:
+                async with await client.start_session() as session:
+                    async with session.start_transaction():
+                        await db[collection].insert_one(doc, session=session)
+                        await db[OUTBOX_COLLECTION].insert_many(jobs, session=session)
+                self._transactions_supported = True
+                self.notify()
+                return
+            except OperationFailure as e:
+                if e.code != ILLEGAL_OPERATION:
+                    raise
+                self._transactions_supported = False
+            logger.warning("⚠️ Transactions not supported by this MongoDB deployment - writing outbox jobs after the booking")
+            # The aborted transaction may have set _id on the document
+            doc.pop('_id', None)
+
+        await db[collection].insert_one(doc)
+        try:
+            await db[OUTBOX_COLLECTION].insert_many(jobs)
+        except Exception as e:
+            # Don't fail the booking if the outbox write fails
+            logger.error("❌ Failed to queue emails for %s %s: %s", collection, doc.get('id'), e)
+            return
+        self.notify()
+
+    async def insert_many_with_outbox(self, collection: str, docs: List[Dict],
+                                      jobs_for: Callable[[Dict], List[Dict]]) -> Dict[int, str]:
+        """Insert many bookings with one unordered insert_many and queue jobs for those that were written.
+
+        Returns {index in docs: error} for documents that were not inserted. Rows are
+        independent, so this is not transactional: one bad row must not reject the batch.
+        """
+        if not docs:
+            return {}
+        db = self.get_db()
+        failed: Dict[int, str] = {}
+        try:
+            await db[collection].insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get('writeErrors', []):
+                failed[error['index']] = error.get('errmsg', 'write failed')[:200]
+
+        jobs = [job for index, doc in enumerate(docs) if index not in failed for job in jobs_for(doc)]
+        if jobs:
+            try:
+                await db[OUTBOX_COLLECTION].insert_many(jobs, ordered=False)
+            except Exception as e:
+                # Don't fail the import if the outbox write fails
+                logger.error("❌ Failed to queue emails for %s %s documents: %s", len(docs) - len(failed), collection, e)
+                return failed
+            self.notify()
+        return failed
+
+    def notify(self):
+        """Wake idle workers after new jobs were queued"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self):
+        """Start the worker pool on the running event loop"""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(index), name=f"email-dispatcher-{index}")
+            for index in range(self.workers)
+        ]
+        logger.info("📧 Email dispatcher started with %s workers", self.workers)
+
+    async def stop(self):
+        """Cancel the worker pool; claimed jobs are retried once their lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                db = self.get_db()
+                jobs = await self._claim_many(db) if db is not None else []
+                if jobs:
+                    # Sent together so the batcher sees every claimed email in one window
+                    results = await asyncio.gather(*(self._process(db, job) for job in jobs), return_exceptions=True)
+                    for job, result in zip(jobs, results):
+                        if isinstance(result, Exception):
+                            # The lease expires and the job is claimed again
+                            logger.error("❌ Email dispatcher worker %s failed on job %s: %s", index, job["id"], result)
+                    continue
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    self._wakeup.clear()
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("❌ Email dispatcher worker %s error: %s", index, e)
+                await asyncio.sleep(self.poll_interval)
+
+    async def _claim_many(self, db) -> List[Dict]:
+        """Lease up to claim_batch due jobs, stopping early when none are left"""
+        jobs = []
+        while len(jobs) < self.claim_batch:
+            job = await self._claim(db)
+            if job is None:
+                break
+            jobs.append(job)
+        return jobs
+
+    async def _claim(self, db) -> Optional[Dict]:
+        """Lease the next due job; jobs whose lease expired (crashed worker) are claimed again"""
+        now = datetime.now(timezone.utc)
+        return await db[OUTBOX_COLLECTION].find_one_and_update(
+            {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"status": "sending", "locked_until": {"$lte": now}},
+            ]},
+            {
+                "$set": {"status": "sending", "locked_until": now + timedelta(seconds=self.lease_seconds)},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _process(self, db, job: Dict):
+        if job.get("trace"):
+            attributes = {"email.kind": job["kind"], "outbox.attempt": job.get("attempts", 1), "booking.id": job["ref_id"]}
+            with tracer.root(f"outbox {job['kind']}", attributes=attributes, parent=job["trace"]):
+                await self._send_and_record(db, job)
+        else:
+            await self._send_and_record(db, job)
+
+    async def _send_and_record(self, db, job: Dict):
+        send = getattr(self.email_service, EMAIL_KINDS[job["kind"]])
+        error = None
+        try:
+            sent = await send(job["payload"])
+        except Exception as e:
+            sent = False
+            error = str(e)[:500]
+
+        now = datetime.now(timezone.utc)
+        if sent:
+            with span("mongodb mark outbox job sent", {"db.system": "mongodb", "db.collection": OUTBOX_COLLECTION}, KIND_CLIENT):
+                await db[OUTBOX_COLLECTION].update_one(
+                    {"id": job["id"]},
+                    {"$set": {"status": "sent", "sent_at": now, "locked_until": None, "last_error": None}}
+                )
+            if job.get("marks_email_sent"):
+                with span("mongodb mark email sent", {"db.system": "mongodb", "db.collection": job["collection"]}, KIND_CLIENT):
+                    await db[job["collection"]].update_one(
+                        {"id": job["ref_id"]},
+                        {"$set": {"email_sent": True}}
+                    )
+            logger.info("✅ Outbox email %s sent for %s %s", job['kind'], job['collection'], job['ref_id'])
+            return
+
+        attempts = job.get("attempts", 1)
+        if attempts >= self.max_attempts:
+            update = {"status": "failed", "locked_until": None, "last_error": error or "send failed"}
+            logger.error("❌ Outbox email %s for %s failed after %s attempts", job['kind'], job['ref_id'], attempts)
+        else:
+            delay = self.retry_base_seconds * (2 ** (attempts - 1))
+            update = {
+                "status": "pending",
+                "locked_until": None,
+                "next_attempt_at": now + timedelta(seconds=delay),
+                "last_error": error or "send failed",
+            }
+            logger.warning("⚠️ Outbox email %s for %s failed (attempt %s), retrying in %ss", job['kind'], job['ref_id'], attempts, delay)
+        with span("mongodb reschedule outbox job", {"db.system": "mongodb", "db.collection": OUTBOX_COLLECTION}, KIND_CLIENT):
+            await db[OUTBOX_COLLECTION].update_one({"id": job["id"]}, {"$set": update})
@@ -0,0 +1,440 @@
+"""
+Email Templates
+HTML emails rendered with f-strings: the static markup (CSS, header, footer) is assembled once at import,
+and every field value is HTML-escaped unless it is marked safe
+"""
+from html import escape
+from typing import Tuple
+
+
+class SafeHtml(str):
+    """Markup that is inserted as-is (already rendered or trusted), never escaped"""
+
+
+def escape_html(value) -> str:
+    """HTML-escape a field value; SafeHtml passes through and clean strings are returned untouched"""
+    if value.__class__ is SafeHtml:
+        return value
+    value = "" if value is None else str(value)
+    # Most customer input needs no escaping; these membership tests are much cheaper than html.escape
+    if '&' in value or '<' in value or '>' in value or '"' in value or "'" in value:
+        return escape(value, quote=True)
+    return value
+
+
+# Shared styles ---------------------------------------------------------------
+
+def _customer_css(accent: str, accent_dark: str, details_class: str, label_width: int, extra: str = "") -> str:
+    return f"""
+    body {{
+      font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
+      line-height: 1.6;
+      color: #333;
+      max-width: 600px;
+      margin: 0 auto;
+      padding: 20px;
+      background-color: #f4f4f4;
+    }}
+    .container {{
+      background-color: #ffffff;
+      border-radius: 8px;
+      overflow: hidden;
+      box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }}
+    .header {{
+      background: linear-gradient(135deg, {accent} 0%, {accent_dark} 100%);
+      color: white;
+      padding: 30px 20px;
+      text-align: center;
+    }}
+    .header h1 {{
+      margin: 0;
+      font-size: 28px;
+      font-weight: 600;
+    }}
+    .content {{
+      padding: 30px 20px;
+    }}
+    .greeting {{
+      font-size: 16px;
+      margin-bottom: 20px;
+    }}
+    .{details_class} {{
+      background-color: #f8f9fa;
+      border-left: 4px solid {accent};
+      padding: 20px;
+      margin: 25px 0;
+      border-radius: 4px;
+    }}
+    .{details_class} h3 {{
+      margin-top: 0;
+      color: {accent};
+      font-size: 18px;
+    }}
+    .detail-row {{
+      margin: 12px 0;
+      display: flex;
+      align-items: center;
+    }}
+    .detail-label {{
+      font-weight: 600;
+      color: #555;
+      min-width: {label_width}px;
+    }}
+    .detail-value {{
+      color: #333;
+    }}{extra}
+    .contact-info {{
+      margin-top: 25px;
+      padding-top: 20px;
+      border-top: 1px solid #e0e0e0;
+    }}
+    .contact-info p {{
+      margin: 8px 0;
+      color: #666;
+    }}
+    .footer {{
+      background-color: #f8f9fa;
+      padding: 20px;
+      text-align: center;
+      color: #666;
+      font-size: 12px;
+    }}"""
+
+
+def _admin_css(accent: str) -> str:
+    return f"""
+    body {{
+      font-family: Arial, sans-serif;
+      line-height: 1.6;
+      color: #333;
+      max-width: 600px;
+      margin: 0 auto;
+      padding: 20px;
+    }}
+    .header {{
+      background-color: {accent};
+      color: white;
+      padding: 20px;
+      text-align: center;
+      border-radius: 6px 6px 0 0;
+    }}
+    .content {{
+      background-color: #f9f9f9;
+      padding: 20px;
+      border: 1px solid #ddd;
+    }}
+    .info-section {{
+      background-color: white;
+      padding: 15px;
+      margin: 15px 0;
+      border-left: 4px solid {accent};
+      border-radius: 4px;
+    }}
+    .info-row {{
+      margin: 8px 0;
+    }}
+    .label {{
+      font-weight: bold;
+      color: #555;
+    }}
+    .footer {{
+      text-align: center;
+      padding: 15px;
+      color: #666;
+      font-size: 12px;
+    }}"""
+
+
+def _customer_document(css: str, title: str, body: str, footer: str) -> str:
+    return f"""
+<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <style>{css}
+  </style>
+</head>
+<body>
+  <div class="container">
+    <div class="header">
+      <h1>{title}</h1>
+    </div>
+    <div class="content">{body}
+    </div>
+    <div class="footer">
+      <p>{footer}</p>
+      <p>This is an automated confirmation email. Please do not reply directly to this message.</p>
+    </div>
+  </div>
+</body>
+</html>
+"""
+
+
+def _admin_document(css: str, title: str, body: str, footer: str) -> str:
+    return f"""
+<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <style>{css}
+  </style>
+</head>
+<body>
+  <div class="header">
+    <h2>{title}</h2>
+  </div>
+  <div class="content">{body}
+  </div>
+  <div class="footer">
+    <p>{footer}</p>
+  </div>
+</body>
+</html>
+"""
+
+
+# Placeholder for the body when a document frame is built; split out again by _frame
+_BODY = "\x00body\x00"
+
+
+def _frame(document: str) -> Tuple[str, str]:
+    """(markup before the body, markup after it) of a document built with _BODY as its body"""
+    head, tail = document.split(_BODY)
+    return head, tail
+
+
+APPOINTMENT_ACCENT = "#14B8A6"
+PILGRIMAGE_ACCENT = "#2563EB"
+
+_APPOINTMENT_EXTRA_CSS = """
+    .location {
+      background-color: #f8f9fa;
+      padding: 15px;
+      border-radius: 4px;
+      margin: 20px 0;
+    }"""
+
+# Fragments -------------------------------------------------------------------
+
+DEFAULT_OFFICE_ADDRESS = SafeHtml('1st Floor, Door F1B-013D<br>Town Center Building (TCB)<br>Kigali City, Rwanda')
+
+
+def in_person_location(address) -> SafeHtml:
+    return SafeHtml(f"""
+      <div class="location">
+        <h3 style="margin-top: 0; color: {APPOINTMENT_ACCENT};">📍 Meeting Location</h3>
+        <p style="margin: 5px 0;"><strong>CardX Academia</strong><br>
+        {escape_html(address)}</p>
+      </div>
+""")
+
+
+# Most in-person appointments use the office address, so that block is rendered once
+DEFAULT_IN_PERSON_LOCATION = in_person_location(DEFAULT_OFFICE_ADDRESS)
+
+VIRTUAL_LOCATION = SafeHtml(f"""
+      <div class="location">
+        <h3 style="margin-top: 0; color: {APPOINTMENT_ACCENT};">💻 Virtual Meeting</h3>
+        <p style="margin: 5px 0;">This is a virtual appointment. You will receive a meeting link via email before your appointment time.</p>
+      </div>
+""")
+
+# Documents -------------------------------------------------------------------
+
+_APPOINTMENT_CONFIRMATION_HEAD, _APPOINTMENT_CONFIRMATION_TAIL = _frame(_customer_document(
+    css=_customer_css(APPOINTMENT_ACCENT, "#0D9488", "appointment-details", 120, _APPOINTMENT_EXTRA_CSS),
+    title="✓ Appointment Confirmed",
+    footer="© 2024 CardX Academia. All rights reserved.",
+    body=_BODY,
+))
+
+
+def appointment_confirmation(*, customer_name, formatted_date, appointment_time, service_display, duration,
+                             type_display, worker, notes, location_block: SafeHtml) -> str:
+    """Customer confirmation; the consultant and notes rows are left out when empty"""
+    e = escape_html
+    worker_row = f'<div class="detail-row"><span class="detail-label">Consultant:</span><span class="detail-value">{e(worker)}</span></div>' if worker else ''
+    notes_row = f'<div class="detail-row"><span class="detail-label">Notes:</span><span class="detail-value">{e(notes)}</span></div>' if notes else ''
+    return f"""{_APPOINTMENT_CONFIRMATION_HEAD}
+      <div class="greeting">
+        <p>Dear {e(customer_name)},</p>
+        <p>Thank you for booking an appointment with <strong>CardX Academia</strong>. Your appointment has been successfully confirmed!</p>
+      </div>
+
+      <div class="appointment-details">
+        <h3>Appointment Details</h3>
+        <div class="detail-row">
+          <span class="detail-label">Date:</span>
+          <span class="detail-value">{e(formatted_date)}</span>
+        </div>
+        <div class="detail-row">
+          <span class="detail-label">Time:</span>
+          <span class="detail-value">{e(appointment_time)}</span>
+        </div>
+        <div class="detail-row">
+          <span class="detail-label">Service:</span>
+          <span class="detail-value">{e(service_display)}</span>
+        </div>
+        <div class="detail-row">
+          <span class="detail-label">Duration:</span>
+          <span class="detail-value">{e(duration)} minutes</span>
+        </div>
+        <div class="detail-row">
+          <span class="detail-label">Type:</span>
+          <span class="detail-value">{e(type_display)}</span>
+        </div>
+        {worker_row}
+        {notes_row}
+      </div>
+      {location_block}
+      <div class="contact-info">
+        <p><strong>Need to reschedule or cancel?</strong></p>
+        <p>Please contact us at:</p>
+        <p>📧 Email: <a href="mailto:info@cardxacademia.com" style="color: #14B8A6;">info@cardxacademia.com</a></p>
+        <p>📞 Phone: <a href="tel:+250788603451" style="color: #14B8A6;">+250 788 603 451</a></p>
+      </div>
+
+      <p style="margin-top: 25px;">We look forward to meeting you and helping you achieve your goals!</p>
+      <p>Best regards,<br><strong>The CardX Academia Team</strong></p>{_APPOINTMENT_CONFIRMATION_TAIL}"""
+
+
+_APPOINTMENT_ADMIN_HEAD, _APPOINTMENT_ADMIN_TAIL = _frame(_admin_document(
+    css=_admin_css(APPOINTMENT_ACCENT),
+    title="🔔 New Appointment Booking",
+    footer="This is an automated notification from CardX Academia booking system.",
+    body=_BODY,
+))
+
+
+def appointment_admin(*, customer_name, customer_email, customer_phone, customer_country, appointment_id,
+                      formatted_date, appointment_time, service_display, duration, type_display, location,
+                      worker, notes) -> str:
+    e = escape_html
+    return f"""{_APPOINTMENT_ADMIN_HEAD}
+    <p>A new appointment has been booked through the website.</p>
+
+    <div class="info-section">
+      <h3 style="margin-top: 0; color: #14B8A6;">Customer Information</h3>
+      <div class="info-row"><span class="label">Name:</span> {e(customer_name)}</div>
+      <div class="info-row"><span class="label">Email:</span> <a href="mailto:{e(customer_email)}">{e(customer_email)}</a></div>
+      <div class="info-row"><span class="label">Phone:</span> <a href="tel:{e(customer_phone)}">{e(customer_phone)}</a></div>
+      <div class="info-row"><span class="label">Country:</span> {e(customer_country)}</div>
+    </div>
+
+    <div class="info-section">
+      <h3 style="margin-top: 0; color: #14B8A6;">Appointment Details</h3>
+      <div class="info-row"><span class="label">Appointment ID:</span> {e(appointment_id)}</div>
+      <div class="info-row"><span class="label">Date:</span> {e(formatted_date)}</div>
+      <div class="info-row"><span class="label">Time:</span> {e(appointment_time)}</div>
+      <div class="info-row"><span class="label">Service:</span> {e(service_display)}</div>
+      <div class="info-row"><span class="label">Duration:</span> {e(duration)} minutes</div>
+      <div class="info-row"><span class="label">Type:</span> {e(type_display)}</div>
+      <div class="info-row"><span class="label">Location:</span> {e(location)}</div>
+      <div class="info-row"><span class="label">Consultant:</span> {e(worker)}</div>
+      <div class="info-row"><span class="label">Notes:</span> {e(notes)}</div>
+    </div>
+
+    <p style="margin-top: 20px;"><strong>Action Required:</strong> Please confirm this appointment in your system.</p>{_APPOINTMENT_ADMIN_TAIL}"""
+
+
+_PILGRIMAGE_CONFIRMATION_HEAD, _PILGRIMAGE_CONFIRMATION_TAIL = _frame(_customer_document(
+    css=_customer_css(PILGRIMAGE_ACCENT, "#1E40AF", "booking-details", 140),
+    title="✈️ Pilgrimage Booking Confirmed!",
+    footer="© 2024 CardX Academia & Travel Tours. All rights reserved.",
+    body=_BODY,
+))
+
+
+def pilgrimage_confirmation(*, customer_name, booking_id, tour_dates, tour_cost, formatted_date) -> str:
+    e = escape_html
+    return f"""{_PILGRIMAGE_CONFIRMATION_HEAD}
+      <div class="greeting">
+        <p>Dear {e(customer_name)},</p>
+        <p>Thank you for booking the <strong>Holy Land Pilgrimage to Israel</strong> with CardX Academia & Travel Tours. Your booking has been successfully received and confirmed!</p>
+      </div>
+
+      <div class="booking-details">
+        <h3>Booking Details</h3>
+        <div class="detail-row">
+          <span class="detail-label">Booking ID:</span>
+          <span class="detail-value">{e(booking_id)}</span>
+        </div>
+        <div class="detail-row">
+          <span class="detail-label">Tour Dates:</span>
+          <span class="detail-value">{e(tour_dates)}</span>
+        </div>
+        <div class="detail-row">
+          <span class="detail-label">Tour Cost:</span>
+          <span class="detail-value"><strong>{e(tour_cost)}</strong> per person</span>
+        </div>
+        <div class="detail-row">
+          <span class="detail-label">Booking Date:</span>
+          <span class="detail-value">{e(formatted_date)}</span>
+        </div>
+      </div>
+
+      <div class="booking-details">
+        <h3>Next Steps</h3>
+        <p style="margin: 8px 0;">1. Our team will review your application and contact you within 2-3 business days.</p>
+        <p style="margin: 8px 0;">2. You will receive further instructions regarding payment and required documents.</p>
+        <p style="margin: 8px 0;">3. Please ensure your passport is valid for at least 6 months from the travel date.</p>
+        <p style="margin: 8px 0;">4. Registration deadline: <strong>March 15, 2026</strong></p>
+      </div>
+
+      <div class="contact-info">
+        <p><strong>Questions or need assistance?</strong></p>
+        <p>Please contact us at:</p>
+        <p>📧 Email: <a href="mailto:tours@cardxacademia.com" style="color: #2563EB;">tours@cardxacademia.com</a></p>
+        <p>📞 Phone: <a href="tel:+250788603451" style="color: #2563EB;">+250 788 603 451</a></p>
+        <p>📍 Office: 1st Floor, Door F1B-013D, Town Center Building (TCB), Kigali City</p>
+      </div>
+
+      <p style="margin-top: 25px;">We look forward to accompanying you on this spiritual journey to the Holy Land!</p>
+      <p>Blessings,<br><strong>The CardX Academia & Travel Tours Team</strong></p>{_PILGRIMAGE_CONFIRMATION_TAIL}"""
+
+
+_PILGRIMAGE_ADMIN_HEAD, _PILGRIMAGE_ADMIN_TAIL = _frame(_admin_document(
+    css=_admin_css(PILGRIMAGE_ACCENT),
+    title="✈️ New Israel Pilgrimage Booking",
+    footer="This is an automated notification from CardX Academia & Travel Tours booking system.",
+    body=_BODY,
+))
+
+
+def pilgrimage_admin(*, customer_name, customer_email, customer_phone, customer_city, customer_country,
+                     passport_number, passport_expiry, booking_id, tour_dates, tour_cost, church_name,
+                     emergency_contact, emergency_phone, medical_conditions, dietary_requirements,
+                     special_requests, formatted_date) -> str:
+    e = escape_html
+    return f"""{_PILGRIMAGE_ADMIN_HEAD}
+    <p>A new Israel Pilgrimage booking has been submitted through the website.</p>
+
+    <div class="info-section">
+      <h3 style="margin-top: 0; color: #2563EB;">Customer Information</h3>
+      <div class="info-row"><span class="label">Name:</span> {e(customer_name)}</div>
+      <div class="info-row"><span class="label">Email:</span> <a href="mailto:{e(customer_email)}">{e(customer_email)}</a></div>
+      <div class="info-row"><span class="label">Phone:</span> <a href="tel:{e(customer_phone)}">{e(customer_phone)}</a></div>
+      <div class="info-row"><span class="label">City:</span> {e(customer_city)}</div>
+      <div class="info-row"><span class="label">Country:</span> {e(customer_country)}</div>
+      <div class="info-row"><span class="label">Passport Number:</span> {e(passport_number)}</div>
+      <div class="info-row"><span class="label">Passport Expiry:</span> {e(passport_expiry)}</div>
+    </div>
+
+    <div class="info-section">
+      <h3 style="margin-top: 0; color: #2563EB;">Booking Details</h3>
+      <div class="info-row"><span class="label">Booking ID:</span> {e(booking_id)}</div>
+      <div class="info-row"><span class="label">Tour Dates:</span> {e(tour_dates)}</div>
+      <div class="info-row"><span class="label">Tour Cost:</span> {e(tour_cost)} per person</div>
+      <div class="info-row"><span class="label">Church Name:</span> {e(church_name)}</div>
+      <div class="info-row"><span class="label">Emergency Contact:</span> {e(emergency_contact)}</div>
+      <div class="info-row"><span class="label">Emergency Phone:</span> {e(emergency_phone)}</div>
+      <div class="info-row"><span class="label">Medical Conditions:</span> {e(medical_conditions)}</div>
+      <div class="info-row"><span class="label">Dietary Requirements:</span> {e(dietary_requirements)}</div>
+      <div class="info-row"><span class="label">Special Requests:</span> {e(special_requests)}</div>
+      <div class="info-row"><span class="label">Booking Date:</span> {e(formatted_date)}</div>
+    </div>
+
+    <p style="margin-top: 20px;"><strong>Action Required:</strong> Please review this booking and follow up with the customer regarding payment and required documents.</p>{_PILGRIMAGE_ADMIN_TAIL}"""
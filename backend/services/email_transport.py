@@ -0,0 +1,91 @@
+"""
+Resend HTTP Transport
+Async client for the Resend REST API that keeps one pool of keep-alive connections across sends
+"""
+import os
+import logging
+from typing import Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RESEND_API_URL = "https://api.resend.com"
+
+
+class ResendError(Exception):
+    """Raised when Resend rejects a request or returns an unexpected response"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ResendTransport:
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = RESEND_API_URL,
+        pool_size: int = 10,
+        keepalive_connections: int = 5,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        # Created lazily so the pool is bound to the event loop that uses it
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def from_env(cls, api_key: str) -> "ResendTransport":
+        """Build a transport using the RESEND_* pool and timeout settings"""
+        return cls(
+            api_key,
+            base_url=os.environ.get('RESEND_API_URL', RESEND_API_URL),
+            pool_size=int(os.environ.get('RESEND_POOL_SIZE', '10')),
+            keepalive_connections=int(os.environ.get('RESEND_KEEPALIVE_CONNECTIONS', '5')),
+            keepalive_expiry=float(os.environ.get('RESEND_KEEPALIVE_EXPIRY', '30')),
+            timeout=float(os.environ.get('RESEND_TIMEOUT', '10')),
+            connect_timeout=float(os.environ.get('RESEND_CONNECT_TIMEOUT', '5')),
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                limits=self.limits,
+                timeout=self.timeout,
+            )
+        return self._client
+
+    async def _post(self, path: str, payload, headers: Optional[Dict] = None):
+        response = await self._get_client().post(path, json=payload, headers=headers)
+        if response.status_code >= 400:
+            try:
+                message = response.json().get('message', response.text)
+            except ValueError:
+                message = response.text
+            raise ResendError(f"Resend API error {response.status_code}: {message}", response.status_code)
+        return response.json()
+
+    async def send(self, params: Dict) -> Dict:
+        """Send one email; returns Resend's response body ({"id": ...})"""
+        return await self._post("/emails", params)
+
+    async def send_batch(self, messages: List[Dict]) -> Dict:
+        """Send up to 100 emails in one request; invalid items are reported per index instead of failing the batch"""
+        return await self._post("/emails/batch", messages, headers={"x-batch-validation": "permissive"})
+
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,102 @@
+"""
+Streaming Export
+Turns a Motor cursor into CSV or NDJSON chunks with bounded memory, for StreamingResponse downloads
+"""
+import csv
+import io
+import json
+import re
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+
+from services.codec import unwrap_optional
+from services.pagination import lookup
+
+# Rows buffered before a chunk is yielded; memory is bounded by this, not by the collection size
+ROWS_PER_CHUNK = 500
+
+# Spreadsheet apps execute cells starting with these; prefix them so exported text stays text
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Cells that are a plain number ('-12.5', '+250788123456') are left as they are; "-2+3+cmd|..." is not one
+_NUMBER = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+
+
+def model_columns(model: Type[BaseModel], prefix: str = "") -> List[str]:
+    """Dotted paths of every scalar field, nested models flattened ('customer.fullName')"""
+    columns = []
+    for name, field in model.model_fields.items():
+        annotation = unwrap_optional(field.annotation)
+        path = f"{prefix}{name}"
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            columns.extend(model_columns(annotation, f"{path}."))
+        else:
+            columns.append(path)
+    return columns
+
+
+def select_columns(requested: str, available: List[str]) -> List[str]:
+    """Validate a comma-separated column list; a bare prefix ('booking') selects all its columns"""
+    if not requested:
+        return list(available)
+    selected = []
+    for name in (part.strip() for part in requested.split(',')):
+        if not name:
+            continue
+        matches = [column for column in available if column == name or column.startswith(f"{name}.")]
+        if not matches:
+            raise ValueError(f"Unknown column: {name}")
+        selected.extend(column for column in matches if column not in selected)
+    return selected
+
+
+def projection_for(columns: List[str]) -> Dict:
+    return {"_id": 0, **{column: 1 for column in columns}}
+
+
+def csv_cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    text = str(value)
+    if text.startswith(_FORMULA_PREFIXES) and not _NUMBER.fullmatch(text):
+        return "'" + text
+    return text
+
+
+async def csv_chunks(cursor, columns: List[str], prepare: Optional[Callable[[Dict], Dict]] = None,
+                     rows_per_chunk: int = ROWS_PER_CHUNK) -> AsyncIterator[bytes]:
+    """Header row, then rows in chunks of rows_per_chunk, written as documents arrive"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so spreadsheet apps detect UTF-8 (names, churches, dietary notes)
+    buffer.write('\ufeff')
+    writer.writerow(columns)
+    pending = 0
+    try:
+        async for doc in cursor:
+            if prepare is not None:
+                doc = prepare(doc)
+            writer.writerow([csv_cell(lookup(doc, column)) for column in columns])
+            pending += 1
+            if pending >= rows_per_chunk:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        yield buffer.getvalue().encode()
+    finally:
+        await cursor.close()
+
+
+def json_default(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def ndjson_record(doc: Dict) -> str:
+    return json.dumps(doc, default=json_default, ensure_ascii=False)
@@ -0,0 +1,145 @@
+"""
+Health Sampler
+Pings MongoDB on its own schedule and keeps rolling latency/error stats, so health endpoints serve a cached snapshot
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Sampler states
+UNKNOWN = "unknown"
+HEALTHY = "healthy"
+DEGRADED = "degraded"
+UNHEALTHY = "unhealthy"
+NOT_CONNECTED = "not_connected"
+
+
+class HealthSampler:
+    """Background ping loop with hysteresis.
+
+    One failed ping only marks the database degraded; `failure_threshold` consecutive
+    failures mark it unhealthy and call `on_unhealthy` once. It takes `recovery_threshold`
+    consecutive successes to be healthy again.
+    """
+
+    def __init__(
+        self,
+        get_db: Callable,
+        interval: float = 10.0,
+        timeout: float = 3.0,
+        window: int = 30,
+        failure_threshold: int = 3,
+        recovery_threshold: int = 2,
+        on_unhealthy: Optional[Callable[[], None]] = None,
+        probes: Optional[Dict[str, Callable[..., Awaitable]]] = None,
+    ):
+        self.get_db = get_db
+        self.interval = interval
+        self.timeout = timeout
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_threshold = max(1, recovery_threshold)
+        self.on_unhealthy = on_unhealthy
+        # Extra checks run after a successful ping, e.g. index drift: name -> async fn(db)
+        self.probes = probes or {}
+        self._samples = deque(maxlen=window)  # (ok, latency_ms)
+        self._task: Optional[asyncio.Task] = None
+        self.state = UNKNOWN
+        self.consecutive_failures = 0
+        self.consecutive_successes = 0
+        self.last_error: Optional[str] = None
+        self.last_sample_at: Optional[str] = None
+        self.last_latency_ms: Optional[float] = None
+        self.resets = 0
+        self.probe_results: Dict[str, object] = {}
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="health-sampler")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sample()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("❌ Health sampler error: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def sample(self):
+        """Take one sample now (also used by tests and manual reconnects)"""
+        db = self.get_db()
+        self.last_sample_at = datetime.now(timezone.utc).isoformat()
+        if db is None:
+            self.state = NOT_CONNECTED
+            self.consecutive_failures = 0
+            self.consecutive_successes = 0
+            return
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(db.command("ping"), timeout=self.timeout)
+        except Exception as e:
+            self._record_failure("ping timeout" if isinstance(e, asyncio.TimeoutError) else str(e)[:100])
+            return
+        self._record_success((time.perf_counter() - started) * 1000)
+
+        for name, probe in self.probes.items():
+            try:
+                self.probe_results[name] = await asyncio.wait_for(probe(db), timeout=self.timeout)
+            except Exception as e:
+                self.probe_results[name] = {"status": "error", "error": str(e)[:100]}
+
+    def _record_success(self, latency_ms: float):
+        self._samples.append((True, latency_ms))
+        self.last_latency_ms = latency_ms
+        self.consecutive_failures = 0
+        self.consecutive_successes += 1
+        if self.state in (UNKNOWN, NOT_CONNECTED) or self.consecutive_successes >= self.recovery_threshold:
+            if self.state == UNHEALTHY:
+                logger.info("✅ MongoDB health recovered")
+            self.state = HEALTHY
+
+    def _record_failure(self, error: str):
+        self._samples.append((False, None))
+        self.last_error = error
+        self.consecutive_successes = 0
+        self.consecutive_failures += 1
+        if self.consecutive_failures < self.failure_threshold:
+            if self.state != UNHEALTHY:
+                self.state = DEGRADED
+            logger.warning("⚠️ MongoDB ping failed (%s/%s): %s", self.consecutive_failures, self.failure_threshold, error)
+            return
+        if self.state != UNHEALTHY:
+            self.state = UNHEALTHY
+            self.resets += 1
+            logger.error("❌ MongoDB unhealthy after %s failed pings: %s", self.consecutive_failures, error)
+            if self.on_unhealthy is not None:
+                self.on_unhealthy()
+
+    def snapshot(self) -> Dict:
+        latencies = sorted(latency for ok, latency in self._samples if ok)
+        failures = sum(1 for ok, _ in self._samples if not ok)
+        return {
+            "state": self.state,
+            "last_sample_at": self.last_sample_at,
+            "last_latency_ms": round(self.last_latency_ms, 2) if self.last_latency_ms is not None else None,
+            "latency_ms_avg": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "latency_ms_p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2) if latencies else None,
+            "error_rate": round(failures / len(self._samples), 3) if self._samples else 0.0,
+            "samples": len(self._samples),
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "resets": self.resets,
+        }
@@ -0,0 +1,119 @@
+"""
+Index Registry
+Declares the indexes each collection needs, creates them on connect and reports drift
+"""
+import time
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import IndexModel
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    name: str
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+    partial_filter: Optional[Dict] = field(default=None, hash=False)
+
+    def model(self) -> IndexModel:
+        options = {"name": self.name, "unique": self.unique}
+        if self.partial_filter:
+            options["partialFilterExpression"] = self.partial_filter
+        return IndexModel(list(self.keys), **options)
+
+
+INDEX_REGISTRY: Dict[str, List[IndexSpec]] = {
+    "appointments": [
+        # get_appointment / cancel_appointment / update_one({"id": ...})
+        IndexSpec("id_unique", (("id", 1),), unique=True),
+        # Availability and conflict checks: one date, active statuses
+        IndexSpec("date_status_time", (("appointment.date", 1), ("status", 1), ("appointment.time", 1))),
+        # Admin listing: equality filter first, then the keyset sort (date, time, id) so pages are index scans
+        IndexSpec("date_time_id", (("appointment.date", 1), ("appointment.time", 1), ("id", 1))),
+        IndexSpec("status_date_time_id", (("status", 1), ("appointment.date", 1), ("appointment.time", 1), ("id", 1))),
+        IndexSpec("calendar_date_time_id", (("calendar", 1), ("appointment.date", 1), ("appointment.time", 1), ("id", 1))),
+        IndexSpec("service_date_time_id", (("appointment.service_type", 1), ("appointment.date", 1), ("appointment.time", 1), ("id", 1))),
+        IndexSpec("created_at_id", (("created_at", 1), ("id", 1))),
+    ],
+    "pilgrimage_bookings": [
+        IndexSpec("id_unique", (("id", 1),), unique=True),
+        IndexSpec("created_at_id", (("created_at", 1), ("id", 1))),
+        IndexSpec("status_created_at_id", (("status", 1), ("created_at", 1), ("id", 1))),
+    ],
+    "slot_reservations": [
+        # One document per booked grid unit; the unique key is what makes booking race-free
+        IndexSpec("slot_unique", (("date", 1), ("calendar", 1), ("time", 1)), unique=True),
+        IndexSpec("appointment_id", (("appointment_id", 1),)),
+    ],
+    "status_checks": [
+        # GET /api/status keyset pages, newest first
+        IndexSpec("timestamp_id", (("timestamp", -1), ("id", -1))),
+    ],
+    "email_outbox": [
+        IndexSpec("id_unique", (("id", 1),), unique=True),
+        # Dispatcher claims: due pending jobs and expired leases
+        IndexSpec("status_next_attempt", (("status", 1), ("next_attempt_at", 1))),
+        IndexSpec("status_locked_until", (("status", 1), ("locked_until", 1))),
+    ],
+}
+
+
+class IndexManager:
+    def __init__(self, registry: Dict[str, List[IndexSpec]] = None, report_max_age: float = 300.0):
+        self.registry = registry if registry is not None else INDEX_REGISTRY
+        self.report_max_age = report_max_age
+        self._last_report: Optional[Dict] = None
+        self._last_report_at = 0.0
+
+    async def ensure(self, db) -> Dict:
+        """Create every registered index (no-op for existing ones) and return a fresh drift report"""
+        errors = {}
+        for collection, specs in self.registry.items():
+            try:
+                await db[collection].create_indexes([spec.model() for spec in specs])
+            except Exception as e:
+                # An existing index with the same name but different options, or duplicate ids for a unique index
+                errors[collection] = str(e)[:200]
+                logger.error("❌ Failed to ensure indexes on %s: %s", collection, e)
+        report = await self.check(db)
+        if errors:
+            report["errors"] = errors
+        if report["status"] == "ok":
+            logger.info("✅ MongoDB indexes are in place")
+        return report
+
+    async def check(self, db) -> Dict:
+        """Compare the registry with the indexes that exist on the server"""
+        missing, mismatched = [], []
+        for collection, specs in self.registry.items():
+            existing = {}
+            async for index in db[collection].list_indexes():
+                existing[index["name"]] = index
+            for spec in specs:
+                found = existing.get(spec.name)
+                if found is None:
+                    missing.append(f"{collection}.{spec.name}")
+                    continue
+                keys = tuple((key, int(direction)) for key, direction in found["key"].items())
+                if keys != spec.keys or bool(found.get("unique")) != spec.unique:
+                    mismatched.append(f"{collection}.{spec.name}")
+        report = {
+            "status": "ok" if not missing and not mismatched else "drift",
+            "missing": missing,
+            "mismatched": mismatched,
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self._last_report = report
+        self._last_report_at = time.monotonic()
+        return report
+
+    async def report(self, db) -> Dict:
+        """Drift report for /api/health, re-checked at most every report_max_age seconds"""
+        if self._last_report is None or time.monotonic() - self._last_report_at > self.report_max_age:
+            return await self.check(db)
+        return self._last_report
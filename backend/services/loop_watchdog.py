@@ -0,0 +1,246 @@
+"""
+Event-Loop Watchdog
+A background thread that notices when a callback blocks the event loop and records the stack and route responsible
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from services.metrics import EVENT_LOOP_BLOCKS, route_template
+from services.structured_logging import request_id_var
+
+logger = logging.getLogger(__name__)
+
+# Frames under the backend directory are "ours"; the innermost one names the offender
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS_FILE = os.path.abspath(__file__)
+
+
+def short_path(filename: str) -> str:
+    """Path relative to the backend directory or site-packages, for stacks in reports"""
+    path = os.path.abspath(filename)
+    if path.startswith(_APP_ROOT + os.sep):
+        return os.path.relpath(path, _APP_ROOT)
+    marker = f"site-packages{os.sep}"
+    if marker in path:
+        return path.split(marker, 1)[1]
+    return os.sep.join(path.split(os.sep)[-2:])
+
+
+def _is_app_frame(filename: str) -> bool:
+    path = os.path.abspath(filename)
+    return path.startswith(_APP_ROOT + os.sep) and path != _THIS_FILE and "site-packages" not in path
+
+
+class _Ping:
+    """Scheduled on the loop from the watchdog thread; records when the loop got round to it"""
+
+    __slots__ = ("answered", "answered_at")
+
+    def __init__(self):
+        self.answered = threading.Event()
+        self.answered_at = 0.0
+
+    def __call__(self):
+        self.answered_at = time.perf_counter()
+        self.answered.set()
+
+
+class LoopWatchdog:
+    """Pings the event loop from a thread every `interval` seconds.
+
+    A ping that is not answered within `threshold` means a callback is holding the loop; the thread then
+    samples the loop thread's stack, which is still inside the blocking call, and attributes it to the
+    request (or task) being run. Costs one thread wake-up and one loop callback per interval.
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.1, max_offenders: int = 50,
+                 recent: int = 20, stack_depth: int = 30, stuck_after: float = 5.0):
+        self.threshold = threshold
+        self.interval = interval
+        self.max_offenders = max_offenders
+        self.stack_depth = stack_depth
+        self.stuck_after = stuck_after
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        # task -> (scope, request id) of requests in flight, so a blocked task can be traced to its route
+        self._requests: Dict[asyncio.Task, tuple] = {}
+        self._offenders: Dict[tuple, Dict] = {}
+        self._recent = deque(maxlen=recent)
+        self._lags = deque(maxlen=600)
+        self.pings = 0
+        self.blocks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        """Watch the running loop (call from the loop thread, e.g. a startup handler)"""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def track(self, task: asyncio.Task, scope):
+        self._requests[task] = (scope, request_id_var.get())
+
+    def untrack(self, task: asyncio.Task):
+        self._requests.pop(task, None)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            ping = _Ping()
+            sent = time.perf_counter()
+            try:
+                self._loop.call_soon_threadsafe(ping)
+            except RuntimeError:
+                # Loop closed underneath us (process shutting down)
+                return
+            self.pings += 1
+            if not ping.answered.wait(self.threshold):
+                self._capture(ping, sent)
+            elif self._stopping.is_set():
+                return
+            self._lags.append(ping.answered_at - sent)
+            self._stopping.wait(self.interval)
+
+    def _capture(self, ping: _Ping, sent: float):
+        """The loop is blocked right now: sample its stack, then wait for it to come back and record the incident"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.extract_stack(frame)[-self.stack_depth:] if frame is not None else []
+        del frame
+        task = asyncio.current_task(self._loop)
+        route, path, request_id = self._attribute(task)
+        started_at = datetime.now(timezone.utc)
+
+        reported_stuck = False
+        while not ping.answered.wait(1.0):
+            if self._stopping.is_set():
+                return
+            if not reported_stuck and time.perf_counter() - sent >= self.stuck_after:
+                reported_stuck = True
+                logger.error("🧊 Event loop blocked for over %.0fs by %s", self.stuck_after, route,
+                             extra={"route": route, "blocked_request_id": request_id, "stack": _format(stack)})
+
+        duration = ping.answered_at - sent
+        site = next((entry for entry in reversed(stack) if _is_app_frame(entry.filename)), stack[-1] if stack else None)
+        incident = {
+            "at": started_at.isoformat(timespec="milliseconds"),
+            "duration_ms": round(duration * 1000, 1),
+            "route": route,
+            "path": path,
+            "request_id": request_id,
+            "site": _format([site])[0] if site else None,
+            "stack": _format(stack),
+        }
+        self._record(incident)
+        EVENT_LOOP_BLOCKS.labels(route).inc()
+        logger.warning("🐢 Event loop blocked for %.0fms by %s at %s", duration * 1000, route, incident["site"],
+                       extra={"route": route, "blocked_request_id": request_id, "stack": incident["stack"]})
+
+    def _attribute(self, task: Optional[asyncio.Task]):
+        """(route, path, request id) for the task holding the loop"""
+        if task is None:
+            # A plain callback rather than a task step (e.g. a driver or timer callback)
+            return "callback", None, None
+        tracked = self._requests.get(task)
+        if tracked is None:
+            name = task.get_name()
+            # Unnamed tasks are "Task-<n>"; one label for all of them keeps the metric bounded
+            return ("task" if name.startswith("Task-") else f"task:{name}"), None, None
+        scope, request_id = tracked
+        return f"{scope['method']} {route_template(scope)}", scope.get("path"), request_id
+
+    def _record(self, incident: Dict):
+        key = (incident["route"], incident["site"])
+        with self._lock:
+            self.blocks += 1
+            self._recent.append(incident)
+            offender = self._offenders.get(key)
+            if offender is None:
+                if len(self._offenders) >= self.max_offenders:
+                    # Forget the offender that has cost the least loop time so far
+                    del self._offenders[min(self._offenders, key=lambda k: self._offenders[k]["total_ms"])]
+                offender = self._offenders[key] = {
+                    "route": incident["route"], "site": incident["site"], "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                }
+            offender["count"] += 1
+            offender["total_ms"] = round(offender["total_ms"] + incident["duration_ms"], 1)
+            offender["last_seen"] = incident["at"]
+            if incident["duration_ms"] >= offender["max_ms"]:
+                offender["max_ms"] = incident["duration_ms"]
+                offender["worst"] = {field: incident[field] for field in ("at", "path", "request_id", "stack")}
+
+    def stats(self) -> Dict:
+        lags = list(self._lags)
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "interval_ms": round(self.interval * 1000, 1),
+            "pings": self.pings,
+            "blocks": self.blocks,
+            "lag_ms": {
+                "last": round(lags[-1] * 1000, 2) if lags else None,
+                "max": round(max(lags) * 1000, 2) if lags else None,
+            },
+        }
+
+    def report(self, limit: int = 20, sort: str = "total_ms") -> Dict:
+        """Worst offenders by total blocked time (or max_ms / count) plus the most recent incidents"""
+        with self._lock:
+            offenders = sorted(self._offenders.values(), key=lambda offender: offender[sort], reverse=True)[:limit]
+            recent = list(self._recent)[::-1]
+        return {
+            **self.stats(),
+            "offenders": offenders,
+            "recent": [{key: value for key, value in incident.items() if key != "stack"} for incident in recent],
+        }
+
+    def reset(self):
+        with self._lock:
+            self._offenders.clear()
+            self._recent.clear()
+
+
+def _format(stack: List[traceback.FrameSummary]) -> List[str]:
+    return [f"{short_path(entry.filename)}:{entry.lineno} in {entry.name}" + (f": {entry.line}" if entry.line else "")
+            for entry in stack]
+
+
+class LoopWatchdogMiddleware:
+    """ASGI middleware letting the watchdog map the task holding the loop back to its request"""
+
+    def __init__(self, app, watchdog: LoopWatchdog):
+        self.app = app
+        self.watchdog = watchdog
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.watchdog.enabled:
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        self.watchdog.track(task, scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.watchdog.untrack(task)
@@ -0,0 +1,175 @@
+"""
+Prometheus Metrics
+Request latency per route, MongoDB command timings, Resend send latency and event-loop lag, served from /metrics
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from pymongo import monitoring
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time from request received to response sent",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongodb_command_duration_seconds",
+    "Server round-trip time of MongoDB commands as reported by the driver",
+    ["collection", "operation", "outcome"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+MONGO_CIRCUIT_OPEN = Gauge(
+    "mongodb_circuit_open",
+    "1 while the MongoDB circuit breaker is rejecting calls",
+)
+EMAIL_SEND_SECONDS = Histogram(
+    "resend_send_duration_seconds",
+    "Time to hand one email to Resend, including any batch window wait",
+    ["outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+EMAIL_SEND_FAILURES = Counter(
+    "resend_send_failures_total",
+    "Emails Resend did not accept",
+    ["reason"],
+)
+EVENT_LOOP_LAG_SECONDS = Gauge(
+    "event_loop_lag_seconds",
+    "How late the last event-loop tick ran",
+)
+EVENT_LOOP_LAG_MAX_SECONDS = Gauge(
+    "event_loop_lag_max_seconds",
+    "Worst event-loop lag over the recent window",
+)
+EVENT_LOOP_BLOCKS = Counter(
+    "event_loop_blocks_total",
+    "Callbacks that held the event loop longer than the watchdog threshold (LOOP_WATCHDOG_ENABLED)",
+    ["route"],
+)
+
+# Requests that match no route share one label, so scanners cannot create unbounded series
+UNMATCHED_ROUTE = "unmatched"
+
+# endpoint function -> route path, built once per app on first use
+_route_paths: Dict[int, Dict] = {}
+
+
+def route_template(scope) -> str:
+    """Path template of the route that handled the request ('/api/appointments/{appointment_id}').
+
+    Only known after routing: the router records the matched endpoint in the shared scope.
+    """
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return UNMATCHED_ROUTE
+    app = scope["app"]
+    routes = _route_paths.get(id(app))
+    if routes is None:
+        routes = {route.endpoint: route.path for route in app.router.routes if hasattr(route, "endpoint")}
+        _route_paths[id(app)] = routes
+    return routes.get(endpoint, UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request, labelled by route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route_template(scope), str(status)).observe(
+                time.perf_counter() - started
+            )
+
+
+def command_collection(event) -> str:
+    """Collection a driver command started event targets ('-' when it has none)"""
+    value = event.command.get(event.command_name)
+    if isinstance(value, str):
+        return value
+    # getMore carries the cursor id under its name and the collection separately
+    return event.command.get("collection", "-")
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every command the driver sends, per collection and command name.
+
+    The collection is only in the started event, so it is kept until the matching
+    succeeded/failed event. Events arrive from driver threads, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple, str] = {}
+
+    def started(self, event):
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = command_collection(event)
+
+    def _finish(self, event, outcome: str):
+        with self._lock:
+            collection = self._pending.pop((event.connection_id, event.request_id), "-")
+        MONGO_COMMAND_SECONDS.labels(collection, event.command_name, outcome).observe(event.duration_micros / 1e6)
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+
+def observe_email_send(seconds: float, outcome: str, reason: Optional[str] = None):
+    EMAIL_SEND_SECONDS.labels(outcome).observe(seconds)
+    if outcome != "sent":
+        EMAIL_SEND_FAILURES.labels(reason or outcome).inc()
+
+
+class LoopLagMonitor:
+    """Sleeps `interval` seconds in a loop; anything past the interval is time the loop was blocked"""
+
+    def __init__(self, interval: float = 0.5, window: int = 120):
+        self.interval = interval
+        self._lags = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - started - self.interval))
+
+    def record(self, lag: float):
+        self._lags.append(lag)
+        EVENT_LOOP_LAG_SECONDS.set(lag)
+        EVENT_LOOP_LAG_MAX_SECONDS.set(max(self._lags))
@@ -0,0 +1,221 @@
+"""
+MongoDB Client Settings
+Typed, env-driven connection pool, compression, read preference and write concern configuration, plus pool-wait metrics
+"""
+import importlib.util
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from pymongo import ReadPreference, monitoring
+from pymongo.write_concern import WriteConcern
+
+logger = logging.getLogger(__name__)
+
+# Compressor name -> module the driver needs for it (zlib ships with Python)
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+# Collection purposes that get their own write concern
+BOOKING_WRITES = "booking"
+BACKGROUND_WRITES = "background"
+
+
+def available_compressors(requested: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Keep the requested compressors whose libraries are installed, in preference order"""
+    usable = []
+    for name in requested:
+        if name not in COMPRESSOR_MODULES:
+            logger.warning("⚠️ Unknown MongoDB compressor '%s' ignored", name)
+            continue
+        module = COMPRESSOR_MODULES[name]
+        if module is not None and importlib.util.find_spec(module) is None:
+            logger.warning("⚠️ MongoDB compressor '%s' needs the '%s' package - skipped", name, module)
+            continue
+        usable.append(name)
+    return tuple(usable)
+
+
+def _parse_write_concern(value: str, journal: bool, wtimeout_ms: int) -> WriteConcern:
+    w = int(value) if value.isdigit() else value
+    return WriteConcern(w=w, j=journal or None, wtimeout=wtimeout_ms or None)
+
+
+@dataclass(frozen=True)
+class MongoSettings:
+    server_selection_timeout_ms: int = 20000
+    connect_timeout_ms: int = 20000
+    socket_timeout_ms: int = 20000
+    max_pool_size: int = 50
+    min_pool_size: int = 5
+    max_idle_time_ms: int = 300000
+    wait_queue_timeout_ms: int = 5000
+    max_connecting: int = 4
+    compressors: Tuple[str, ...] = ("zstd", "snappy", "zlib")
+    # Staff listing and export queries; bookings and availability always read the primary
+    read_preference: str = "secondaryPreferred"
+    max_staleness_seconds: int = 90
+    booking_write_concern: str = "majority"
+    booking_journal: bool = True
+    background_write_concern: str = "1"
+    write_timeout_ms: int = 10000
+
+    @classmethod
+    def from_env(cls) -> "MongoSettings":
+        env = os.environ.get
+        settings = cls(
+            server_selection_timeout_ms=int(env('MONGO_SERVER_SELECTION_TIMEOUT_MS', '20000')),
+            connect_timeout_ms=int(env('MONGO_CONNECT_TIMEOUT_MS', '20000')),
+            socket_timeout_ms=int(env('MONGO_SOCKET_TIMEOUT_MS', '20000')),
+            max_pool_size=int(env('MONGO_MAX_POOL_SIZE', '50')),
+            min_pool_size=int(env('MONGO_MIN_POOL_SIZE', '5')),
+            max_idle_time_ms=int(env('MONGO_MAX_IDLE_TIME_MS', '300000')),
+            wait_queue_timeout_ms=int(env('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000')),
+            max_connecting=int(env('MONGO_MAX_CONNECTING', '4')),
+            compressors=tuple(
+                name.strip() for name in env('MONGO_COMPRESSORS', 'zstd,snappy,zlib').split(',') if name.strip()
+            ),
+            read_preference=env('MONGO_READ_PREFERENCE', 'secondaryPreferred'),
+            max_staleness_seconds=int(env('MONGO_MAX_STALENESS_SECONDS', '90')),
+            booking_write_concern=env('MONGO_BOOKING_WRITE_CONCERN', 'majority'),
+            booking_journal=env('MONGO_BOOKING_JOURNAL', 'true').lower() == 'true',
+            background_write_concern=env('MONGO_BACKGROUND_WRITE_CONCERN', '1'),
+            write_timeout_ms=int(env('MONGO_WRITE_TIMEOUT_MS', '10000')),
+        )
+        if settings.read_preference not in READ_PREFERENCES:
+            raise ValueError(f"MONGO_READ_PREFERENCE must be one of {', '.join(READ_PREFERENCES)}")
+        if settings.min_pool_size > settings.max_pool_size:
+            raise ValueError("MONGO_MIN_POOL_SIZE cannot exceed MONGO_MAX_POOL_SIZE")
+        return settings
+
+    def client_options(self) -> Dict:
+        """Keyword arguments for AsyncIOMotorClient"""
+        options = {
+            'serverSelectionTimeoutMS': self.server_selection_timeout_ms,
+            'connectTimeoutMS': self.connect_timeout_ms,
+            'socketTimeoutMS': self.socket_timeout_ms,
+            'maxPoolSize': self.max_pool_size,
+            'minPoolSize': self.min_pool_size,
+            'maxIdleTimeMS': self.max_idle_time_ms,
+            'waitQueueTimeoutMS': self.wait_queue_timeout_ms,
+            'maxConnecting': self.max_connecting,
+        }
+        compressors = available_compressors(self.compressors)
+        if compressors:
+            options['compressors'] = ','.join(compressors)
+        return options
+
+    def reads(self):
+        """Read preference for listing and export queries"""
+        mode = READ_PREFERENCES[self.read_preference]
+        if mode is ReadPreference.PRIMARY:
+            return mode
+        # A lagging secondary past this bound is skipped (the server minimum is 90 seconds)
+        return type(mode)(max_staleness=max(self.max_staleness_seconds, 90))
+
+    def write_concern(self, purpose: str) -> WriteConcern:
+        if purpose == BACKGROUND_WRITES:
+            return _parse_write_concern(self.background_write_concern, False, self.write_timeout_ms)
+        return _parse_write_concern(self.booking_write_concern, self.booking_journal, self.write_timeout_ms)
+
+    def read_collection(self, db, name: str):
+        """Collection handle for queries that tolerate replica lag (listings and exports, never availability)"""
+        return db.get_collection(name, read_preference=self.reads())
+
+    def write_collection(self, db, name: str, purpose: str = BOOKING_WRITES):
+        """Collection handle with the write concern for `purpose`"""
+        return db.get_collection(name, write_concern=self.write_concern(purpose))
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Counts pool checkouts and measures how long operations wait for a connection.
+
+    The driver emits check-out started and checked-out on the same thread, so the start
+    time is kept thread-locally. Events arrive from driver threads, hence the lock.
+    """
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._waits = deque(maxlen=window)
+        self.checkouts = 0
+        self.checkout_failures: Dict[str, int] = {}
+        self.in_use = 0
+        self.open_connections = 0
+        self.max_wait_ms = 0.0
+        self.total_wait_ms = 0.0
+
+    def _record_wait(self) -> float:
+        started = getattr(self._local, 'started', None)
+        self._local.started = None
+        return (time.perf_counter() - started) * 1000 if started is not None else 0.0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(0, self.open_connections - 1)
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        self._record_wait()
+        with self._lock:
+            reason = str(event.reason)
+            self.checkout_failures[reason] = self.checkout_failures.get(reason, 0) + 1
+
+    def connection_checked_out(self, event):
+        wait_ms = self._record_wait()
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self._waits.append(wait_ms)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            checkouts = self.checkouts
+            return {
+                "open_connections": self.open_connections,
+                "in_use": self.in_use,
+                "checkouts": checkouts,
+                "checkout_failures": dict(self.checkout_failures),
+                "wait_ms_avg": round(self.total_wait_ms / checkouts, 3) if checkouts else 0.0,
+                "wait_ms_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+                "wait_ms_max": round(self.max_wait_ms, 3),
+            }
@@ -0,0 +1,94 @@
+"""
+Keyset Pagination
+Opaque cursors over a sort key plus NDJSON streaming of Motor cursors, so list endpoints never buffer a whole collection
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Sequence, Tuple
+
+Sort = Sequence[Tuple[str, int]]
+
+
+class InvalidCursor(ValueError):
+    """The cursor token was not produced by encode_cursor for this sort"""
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Cannot put {type(value).__name__} in a cursor")
+
+
+def _object_hook(obj):
+    if set(obj) == {"$date"}:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def lookup(doc: Dict, path: str) -> Any:
+    """Value at a dotted path ('appointment.date'), None when any part is missing"""
+    for key in path.split('.'):
+        doc = doc.get(key) if isinstance(doc, dict) else None
+    return doc
+
+
+def encode_cursor(doc: Dict, sort: Sort) -> str:
+    """Cursor pointing just past `doc` (a raw document that contains every sort field)"""
+    values = [lookup(doc, field) for field, _ in sort]
+    raw = json.dumps(values, default=_default, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str, sort: Sort) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw, object_hook=_object_hook)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise InvalidCursor("Cursor does not match this sort order")
+    return values
+
+
+def keyset_filter(sort: Sort, values: Sequence[Any]) -> Dict:
+    """Filter for documents strictly after `values` in `sort` order.
+
+    For sort (a, b) this is: a past va, or a == va and b past vb. With an index on
+    the sort fields each page is a bounded index scan instead of a skip.
+    """
+    branches = []
+    for position, (field, direction) in enumerate(sort):
+        branch = {prior: values[index] for index, (prior, _) in enumerate(sort[:position])}
+        branch[field] = {"$lt" if direction < 0 else "$gt": values[position]}
+        branches.append(branch)
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+
+def with_cursor(query: Dict, sort: Sort, token: str = None) -> Dict:
+    """Combine a base query with the keyset filter of `token`, if any"""
+    if not token:
+        return query
+    after = keyset_filter(sort, decode_cursor(token, sort))
+    return {"$and": [query, after]} if query else after
+
+
+async def fetch_page(collection, query: Dict, projection: Dict, sort: Sort, limit: int,
+                     token: str = None) -> Tuple[List[Dict], str]:
+    """One page of raw documents and the cursor of the next page (None on the last page)"""
+    cursor = collection.find(with_cursor(query, sort, token), projection).sort(list(sort)).limit(limit + 1)
+    docs = await cursor.to_list(limit + 1)
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1], sort)
+
+
+async def ndjson_lines(cursor, serialize: Callable[[Dict], str]) -> AsyncIterator[bytes]:
+    """Yield one JSON line per document as the driver returns each batch"""
+    try:
+        async for doc in cursor:
+            yield (serialize(doc) + "\n").encode()
+    finally:
+        # Client disconnects stop the generator early; release the server-side cursor
+        await cursor.close()
@@ -0,0 +1,328 @@
+"""
+Sampling Profiler
+Samples Python stacks of the live process and renders them as collapsed stacks for flamegraph tools
+"""
+import asyncio
+import hmac
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from services.loop_watchdog import short_path
+from services.metrics import route_template
+from services.structured_logging import request_id_var
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Debug-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Root frame of a request's samples taken while it was not running on the loop (awaiting I/O or other tasks)
+AWAITING = "[awaiting]"
+
+# Leaf functions of threads that are parked, not working (the loop waiting in select() included);
+# left out unless idle samples are asked for
+_IDLE_LEAVES = {
+    ("selectors.py", "select"), ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"), ("thread.py", "_worker"),
+}
+
+_MAX_DEPTH = 200
+
+
+class ProfilerBusy(Exception):
+    """A timed profile is already running"""
+
+
+class ProfilerUnavailable(Exception):
+    """Timed profiles cannot run in this process (no SIGPROF, or the loop is not on the main thread)"""
+
+
+def _stack(frame, lines: bool) -> tuple:
+    """Root-first code objects (with line numbers when `lines`); turned into labels only when rendered"""
+    entries = []
+    while frame is not None and len(entries) < _MAX_DEPTH:
+        entries.append((frame.f_code, frame.f_lineno) if lines else frame.f_code)
+        frame = frame.f_back
+    entries.reverse()
+    return tuple(entries)
+
+
+def _label(entry, cache: Dict) -> str:
+    label = cache.get(entry)
+    if label is None:
+        if isinstance(entry, str):
+            label = entry
+        elif isinstance(entry, tuple):
+            code, line = entry
+            label = f"{code.co_name} ({short_path(code.co_filename)}:{line})"
+        else:
+            label = f"{entry.co_name} ({short_path(entry.co_filename)})"
+        # ';' separates frames and the last ' ' precedes the count in the collapsed format
+        label = label.replace(";", ":")
+        cache[entry] = label
+    return label
+
+
+def collapse(counts: Counter) -> str:
+    """'frame;frame;frame microseconds' lines, heaviest first, as read by flamegraph.pl, speedscope and inferno"""
+    labels: Dict = {}
+    lines = [f"{';'.join(_label(entry, labels) for entry in stack)} {count}" for stack, count in counts.most_common()]
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES
+
+
+class _Profile:
+    """Sampled stacks with their weight in microseconds"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self.started_at = datetime.now(timezone.utc)
+        self.duration = 0.0
+        self.info: Dict = {}
+        self._started = time.perf_counter()
+
+    def add(self, stack: tuple, weight: int):
+        self.samples += 1
+        self.counts[stack] += weight
+
+    def collapsed(self) -> str:
+        return collapse(self.counts)
+
+    def summary(self) -> Dict:
+        return {
+            "started_at": self.started_at.isoformat(timespec="milliseconds"),
+            "duration_ms": round(self.duration * 1000, 1),
+            "interval_ms": round(self.interval * 1000, 2),
+            "samples": self.samples,
+            "sampled_ms": round(sum(self.counts.values()) / 1000, 1),
+            "awaiting_ms": round(self.counts.get((AWAITING,), 0) / 1000, 1),
+            **self.info,
+        }
+
+
+class ProfileSession(_Profile):
+    """Timed profile of on-CPU time, sampled by a SIGPROF interval timer.
+
+    The signal handler runs on the main thread, which is where uvicorn runs the event loop, at the next
+    bytecode boundary, so each sample is the exact frame that was executing. A sampling thread reading
+    sys._current_frames() would only get the GIL when the loop releases it, which is almost always inside
+    select(), and would see an idle loop. The timer counts CPU time, so an idle process is not sampled at all;
+    each sample weighs one interval.
+    """
+
+    def __init__(self, interval: float, all_threads: bool = False, lines: bool = False, include_idle: bool = False):
+        super().__init__(interval)
+        self.all_threads = all_threads
+        self.lines = lines
+        self.include_idle = include_idle
+        self._weight = int(interval * 1_000_000)
+        self._previous_handler = None
+        self._running = False
+        self._thread_names: Dict[int, str] = {}
+
+    def start(self) -> "ProfileSession":
+        if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+            raise ProfilerUnavailable("Timed profiles need SIGPROF and the event loop on the main thread")
+        self._started = time.perf_counter()
+        self._previous_handler = signal.signal(signal.SIGPROF, self._on_signal)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self._running = True
+        return self
+
+    def stop(self) -> "ProfileSession":
+        if self._running:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+            self._running = False
+            self.duration = time.perf_counter() - self._started
+        return self
+
+    def _on_signal(self, signum, frame):
+        if not self.all_threads:
+            if frame is not None and (self.include_idle or not _is_idle(frame)):
+                self.add(_stack(frame, self.lines), self._weight)
+            return
+        # The timer counts CPU time of every thread; other threads are read where they last released the GIL
+        main_id = threading.get_ident()
+        for thread_id, thread_frame in sys._current_frames().items():
+            if thread_id == main_id:
+                thread_frame = frame
+            if thread_frame is None or (not self.include_idle and _is_idle(thread_frame)):
+                continue
+            self.add((f"thread:{self._thread_name(thread_id)}",) + _stack(thread_frame, self.lines), self._weight)
+
+    def _thread_name(self, thread_id: int) -> str:
+        name = self._thread_names.get(thread_id)
+        if name is None:
+            self._thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            name = self._thread_names.get(thread_id, str(thread_id))
+        return name
+
+
+class RequestProfile(_Profile):
+    """Profile of one request task, sampled from a profile hook on the loop thread (see _RequestHook).
+
+    The hook runs on every call and return, so it records a stack as soon as `interval` of wall time has
+    passed, even for a request that is on the loop for only a few milliseconds, and it does not need the
+    process-wide SIGPROF timer a timed profile may be using. Time while another task holds the loop, or while
+    the loop waits for I/O, is recorded as AWAITING. The hook slows the loop thread while it is installed.
+    """
+
+    def __init__(self, interval: float, task: asyncio.Task, loop: asyncio.AbstractEventLoop):
+        super().__init__(interval)
+        self.task = task
+        self.loop = loop
+        self.last = self._started
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._started
+
+
+class _RequestHook:
+    """The loop thread's sys.setprofile function while any request is being profiled"""
+
+    def __init__(self):
+        self.profiles: List[RequestProfile] = []
+        self._previous = None
+
+    def add(self, profile: RequestProfile):
+        if not self.profiles:
+            self._previous = sys.getprofile()
+            sys.setprofile(self)
+        self.profiles.append(profile)
+
+    def remove(self, profile: RequestProfile):
+        self.profiles.remove(profile)
+        if not self.profiles:
+            sys.setprofile(self._previous)
+            self._previous = None
+
+    def __call__(self, frame, event, arg):
+        now = time.perf_counter()
+        running = None
+        for profile in self.profiles:
+            elapsed = now - profile.last
+            if elapsed < profile.interval:
+                continue
+            profile.last = now
+            if running is None:
+                running = asyncio.current_task(profile.loop)
+            stack = _stack(frame, True) if running is profile.task else (AWAITING,)
+            profile.add(stack, int(elapsed * 1_000_000))
+
+
+class Profiler:
+    """Timed whole-process profiles for staff, and single-request profiles triggered by the X-Debug-Profile header"""
+
+    def __init__(self, token: str = "", interval: float = 0.005, request_interval: float = 0.001,
+                 max_request_profiles: int = 20, max_concurrent_requests: int = 4):
+        self.token = token
+        self.interval = interval
+        self.request_interval = request_interval
+        self.max_request_profiles = max_request_profiles
+        self.max_concurrent_requests = max_concurrent_requests
+        self._timed: Optional[ProfileSession] = None
+        self._hook = _RequestHook()
+        self._request_profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+
+    def requested(self, header_value: Optional[str]) -> bool:
+        """X-Debug-Profile profiles a request only when it carries the admin key"""
+        if not self.token or not header_value:
+            return False
+        return hmac.compare_digest(header_value.encode(), self.token.encode())
+
+    async def profile(self, seconds: float, interval: Optional[float] = None, all_threads: bool = False,
+                      lines: bool = False, include_idle: bool = False) -> ProfileSession:
+        """Sample the process for `seconds` while it keeps serving traffic; one timed profile at a time"""
+        if self._timed is not None:
+            raise ProfilerBusy("A profile is already running")
+        session = ProfileSession(
+            interval or self.interval, all_threads=all_threads, lines=lines, include_idle=include_idle,
+        ).start()
+        self._timed = session
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            session.stop()
+            self._timed = None
+        return session
+
+    def start_request(self) -> Optional[RequestProfile]:
+        """Profile the calling request task; None when too many requests are already being profiled"""
+        if len(self._hook.profiles) >= self.max_concurrent_requests:
+            return None
+        profile = RequestProfile(self.request_interval, asyncio.current_task(), asyncio.get_running_loop())
+        self._hook.add(profile)
+        return profile
+
+    def finish_request(self, profile_id: str, profile: RequestProfile, scope, request_id: Optional[str] = None):
+        self._hook.remove(profile)
+        profile.finish()
+        profile.info = {
+            "id": profile_id, "request_id": request_id, "method": scope["method"], "route": route_template(scope), "path": scope["path"],
+        }
+        self._request_profiles[profile_id] = profile
+        while len(self._request_profiles) > self.max_request_profiles:
+            self._request_profiles.popitem(last=False)
+
+    def request_profile(self, profile_id: str) -> Optional[RequestProfile]:
+        return self._request_profiles.get(profile_id)
+
+    def request_profiles(self) -> List[Dict]:
+        """Stored request profiles, newest first"""
+        return [profile.summary() for profile in reversed(self._request_profiles.values())]
+
+    def merged_request_profiles(self, route: Optional[str] = None) -> str:
+        """Stored request profiles (optionally of one route template) added into one collapsed file"""
+        merged: Counter = Counter()
+        for profile in self._request_profiles.values():
+            if route is None or profile.info.get("route") == route:
+                merged.update(profile.counts)
+        return collapse(merged)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests that send X-Debug-Profile; the profile id is returned in X-Profile-Id"""
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.token:
+            await self.app(scope, receive, send)
+            return
+        header_name = PROFILE_HEADER.lower().encode()
+        header = next((value.decode("latin-1") for name, value in scope["headers"] if name == header_name), None)
+        profile = self.profiler.start_request() if self.profiler.requested(header) else None
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Never the client's X-Request-ID: that would let a caller pick, reuse or overwrite profile ids
+        profile_id = uuid.uuid4().hex
+        logger.info("🔬 Profiling request as %s", profile_id)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            self.profiler.finish_request(profile_id, profile, scope, request_id_var.get())
@@ -0,0 +1,257 @@
+"""
+Data Access Guard
+Per-operation deadlines, a circuit breaker and a concurrency bulkhead around MongoDB calls
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import pymongo
+from pymongo.errors import (
+    AutoReconnect, ConnectionFailure, ExecutionTimeout, NetworkTimeout, PyMongoError, ServerSelectionTimeoutError,
+)
+
+from services.tracing import KIND_CLIENT, span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Errors that mean the database is slow or unreachable; anything else (duplicate keys,
+# validation errors) is an answer from a healthy server and counts as a success
+UNAVAILABLE_ERRORS = (
+    asyncio.TimeoutError, AutoReconnect, ConnectionFailure, ExecutionTimeout,
+    NetworkTimeout, ServerSelectionTimeoutError,
+)
+
+
+def is_unavailable(error: Exception) -> bool:
+    """Unreachable database, or a pymongo.timeout() budget that ran out (write concern timeouts included)"""
+    return isinstance(error, UNAVAILABLE_ERRORS) or (isinstance(error, PyMongoError) and error.timeout)
+
+
+class DatabaseUnavailable(Exception):
+    """The call was rejected or failed; the API answers 503 with Retry-After.
+
+    `outcome_unknown` is set when a write reached the driver and then failed: it may still have been
+    applied, so callers re-read before undoing anything that depends on it.
+    """
+
+    def __init__(self, reason: str, operation: str, retry_after: int = 5, outcome_unknown: bool = False):
+        self.reason = reason
+        self.operation = operation
+        self.retry_after = retry_after
+        self.outcome_unknown = outcome_unknown
+        super().__init__(f"{operation}: {reason}")
+
+
+class CircuitBreaker:
+    """Opens when the failure rate over a rolling window crosses a threshold.
+
+    While open every call is rejected immediately. After `open_seconds` a few trial calls
+    are let through (half-open); if they succeed the breaker closes, otherwise it re-opens.
+    """
+
+    def __init__(self, failure_rate_threshold: float = 0.5, min_calls: int = 10,
+                 window_seconds: float = 30.0, open_seconds: float = 15.0, half_open_max_calls: int = 3):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.state = CLOSED
+        self._outcomes = deque()  # (monotonic time, ok)
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        self.times_opened = 0
+
+    def _trim(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def is_open(self) -> bool:
+        """True while calls are being rejected (does not take a half-open trial slot)"""
+        return self.state == OPEN and time.monotonic() - self._opened_at < self.open_seconds
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self.state = HALF_OPEN
+            self._half_open_in_flight = 0
+            self._half_open_successes = 0
+            logger.info("🔌 MongoDB circuit half-open - sending trial requests")
+        if self.state == HALF_OPEN:
+            if self._half_open_in_flight >= self.half_open_max_calls:
+                return False
+            self._half_open_in_flight += 1
+        return True
+
+    def record(self, ok: bool):
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            if not ok:
+                self._open(now)
+                return
+            self._half_open_successes += 1
+            if self._half_open_successes >= self.half_open_max_calls:
+                self.state = CLOSED
+                self._outcomes.clear()
+                logger.info("✅ MongoDB circuit closed")
+            return
+
+        self._outcomes.append((now, ok))
+        self._trim(now)
+        if self.state == CLOSED and not ok and len(self._outcomes) >= self.min_calls:
+            failures = sum(1 for _, outcome in self._outcomes if not outcome)
+            if failures / len(self._outcomes) >= self.failure_rate_threshold:
+                self._open(now)
+
+    def abandon(self):
+        """A call that was allowed but never reached the database (no outcome to record)"""
+        if self.state == HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self._opened_at = now
+        self.times_opened += 1
+        logger.error("❌ MongoDB circuit opened - failing fast for %.0fs", self.open_seconds)
+
+    def retry_after(self) -> int:
+        if self.state != OPEN:
+            return 1
+        return max(1, int(self.open_seconds - (time.monotonic() - self._opened_at)) + 1)
+
+    def stats(self) -> Dict:
+        self._trim(time.monotonic())
+        failures = sum(1 for _, outcome in self._outcomes if not outcome)
+        return {
+            "state": self.state,
+            "window_calls": len(self._outcomes),
+            "window_failure_rate": round(failures / len(self._outcomes), 3) if self._outcomes else 0.0,
+            "times_opened": self.times_opened,
+        }
+
+
+class Bulkhead:
+    """Caps concurrent MongoDB calls; callers wait at most `max_wait` seconds for a slot"""
+
+    def __init__(self, max_concurrent: int = 20, max_wait: float = 0.5):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_wait = max_wait
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+
+    async def acquire(self) -> bool:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+
+class DataAccess:
+    """Single choke point for request-path MongoDB calls.
+
+    `run` takes a zero-argument callable so a rejected call never creates the driver
+    coroutine. Order: breaker (instant), bulkhead (bounded wait), then the deadline.
+
+    Reads are abandoned client-side when their deadline passes. Writes never are: the driver
+    would carry on and the write could commit after the API had answered 503. Their deadline is
+    a pymongo.timeout() budget instead, sent to the server as maxTimeMS, so the server aborts
+    the write and the driver raises.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, bulkhead: Bulkhead,
+                 read_deadline: float = 3.0, write_deadline: float = 10.0):
+        self.breaker = breaker
+        self.bulkhead = bulkhead
+        self.read_deadline = read_deadline
+        self.write_deadline = write_deadline
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected: Dict[str, int] = {"circuit_open": 0, "bulkhead_full": 0}
+
+    async def run(self, operation: str, call: Callable[[], Awaitable[T]], deadline: float, write: bool = False) -> T:
+        with span(f"mongodb {operation}", {"db.system": "mongodb", "db.operation": operation}, KIND_CLIENT):
+            return await self._run(operation, call, deadline, write)
+
+    async def _run(self, operation: str, call: Callable[[], Awaitable[T]], deadline: float, write: bool) -> T:
+        if not self.breaker.allow():
+            self.rejected["circuit_open"] += 1
+            raise DatabaseUnavailable("circuit open", operation, self.breaker.retry_after())
+        if not await self.bulkhead.acquire():
+            self.rejected["bulkhead_full"] += 1
+            self.breaker.abandon()
+            raise DatabaseUnavailable("too many concurrent database calls", operation, 1)
+
+        self.calls += 1
+        try:
+            if write:
+                with pymongo.timeout(deadline):
+                    result = await call()
+            else:
+                result = await asyncio.wait_for(call(), timeout=deadline)
+        except asyncio.CancelledError:
+            # Client went away; says nothing about the database
+            self.breaker.abandon()
+            raise
+        except Exception as e:
+            if not is_unavailable(e):
+                # The server answered, e.g. with a duplicate key error
+                self.breaker.record(True)
+                raise
+            self.failures += 1
+            timed_out = isinstance(e, asyncio.TimeoutError) or (isinstance(e, PyMongoError) and e.timeout)
+            if timed_out:
+                self.timeouts += 1
+            self.breaker.record(False)
+            logger.warning("⚠️ MongoDB %s failed: %s", operation, type(e).__name__)
+            reason = f"deadline of {deadline:g}s exceeded" if timed_out else "database unreachable"
+            raise DatabaseUnavailable(reason, operation, self.breaker.retry_after(), outcome_unknown=write) from e
+        else:
+            self.breaker.record(True)
+            return result
+        finally:
+            self.bulkhead.release()
+
+    def check(self, operation: str):
+        """Fail fast for calls that cannot go through `run`, such as streamed cursors"""
+        if self.breaker.is_open():
+            self.rejected["circuit_open"] += 1
+            raise DatabaseUnavailable("circuit open", operation, self.breaker.retry_after())
+
+    async def read(self, operation: str, call: Callable[[], Awaitable[T]], deadline: Optional[float] = None) -> T:
+        return await self.run(operation, call, deadline if deadline is not None else self.read_deadline)
+
+    async def write(self, operation: str, call: Callable[[], Awaitable[T]], deadline: Optional[float] = None) -> T:
+        return await self.run(operation, call, deadline if deadline is not None else self.write_deadline, write=True)
+
+    def stats(self) -> Dict:
+        return {
+            "breaker": self.breaker.stats(),
+            "bulkhead": {"max_concurrent": self.bulkhead.max_concurrent, "in_flight": self.bulkhead.in_flight},
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "rejected": dict(self.rejected),
+            "read_deadline_seconds": self.read_deadline,
+            "write_deadline_seconds": self.write_deadline,
+        }
@@ -0,0 +1,152 @@
+"""
+Scheduling Engine
+Computes appointment availability by interval overlap, honouring duration, business hours and each consultant's calendar
+"""
+import os
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Appointments without a consultant share this calendar
+GENERAL_CALENDAR = None
+
+DEFAULT_DURATION = 30
+
+
+def calendar_key(worker: Optional[str]) -> Optional[str]:
+    """Calendar a consultant name books into: ' Alice', 'alice' and 'ALICE' are the same person"""
+    if worker is None:
+        return GENERAL_CALENDAR
+    return worker.strip().casefold() or GENERAL_CALENDAR
+
+
+def parse_time(value: str) -> int:
+    """'HH:MM' -> minutes since midnight"""
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def format_time(minutes: int) -> str:
+    """Minutes since midnight -> 'HH:MM'"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+@dataclass(frozen=True)
+class BusinessHours:
+    open_minute: int = 9 * 60
+    close_minute: int = 17 * 60
+    slot_interval: int = 30
+
+    @classmethod
+    def from_env(cls) -> "BusinessHours":
+        """Read BUSINESS_HOURS ('09:00-17:00') and SLOT_INTERVAL_MINUTES"""
+        opening, closing = os.environ.get('BUSINESS_HOURS', '09:00-17:00').split('-')
+        return cls(
+            open_minute=parse_time(opening.strip()),
+            close_minute=parse_time(closing.strip()),
+            slot_interval=int(os.environ.get('SLOT_INTERVAL_MINUTES', '30')),
+        )
+
+    def slot_starts(self) -> List[int]:
+        """Every bookable start on the slot grid"""
+        return list(range(self.open_minute, self.close_minute, self.slot_interval))
+
+    def is_on_grid(self, start: int) -> bool:
+        return (
+            self.open_minute <= start < self.close_minute
+            and (start - self.open_minute) % self.slot_interval == 0
+        )
+
+
+class IntervalCalendar:
+    """Busy time of one calendar for one day, kept as sorted, merged [start, end) intervals"""
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        for start, end in sorted(intervals):
+            self._append(start, end)
+
+    def _append(self, start: int, end: int):
+        # Input is sorted by start, so only the last interval can overlap or touch
+        if self._ends and start <= self._ends[-1]:
+            self._ends[-1] = max(self._ends[-1], end)
+        else:
+            self._starts.append(start)
+            self._ends.append(end)
+
+    def add(self, start: int, end: int):
+        """Insert a busy interval, merging with any interval it overlaps or touches"""
+        first = bisect_right(self._starts, start)
+        if first > 0 and self._ends[first - 1] >= start:
+            first -= 1
+            start = self._starts[first]
+            end = max(end, self._ends[first])
+        last = first
+        while last < len(self._starts) and self._starts[last] <= end:
+            end = max(end, self._ends[last])
+            last += 1
+        self._starts[first:last] = [start]
+        self._ends[first:last] = [end]
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """True if [start, end) intersects any busy interval - O(log n)"""
+        index = bisect_right(self._starts, start) - 1
+        if index >= 0 and self._ends[index] > start:
+            return True
+        following = index + 1
+        return following < len(self._starts) and self._starts[following] < end
+
+    def __len__(self):
+        return len(self._starts)
+
+
+class DaySchedule:
+    """All calendars for one date, built from that day's active appointment documents"""
+
+    def __init__(self, hours: BusinessHours):
+        self.hours = hours
+        self._calendars: Dict[Optional[str], IntervalCalendar] = {}
+        self.booking_count = 0
+
+    @classmethod
+    def from_appointments(cls, appointments: Iterable[Dict], hours: BusinessHours) -> "DaySchedule":
+        schedule = cls(hours)
+        busy: Dict[Optional[str], List[Tuple[int, int]]] = {}
+        for appt in appointments:
+            info = appt.get('appointment') or {}
+            try:
+                start = parse_time(info['time'])
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+            duration = info.get('duration') or DEFAULT_DURATION
+            busy.setdefault(calendar_key(info.get('worker')), []).append((start, start + duration))
+            schedule.booking_count += 1
+        schedule._calendars = {worker: IntervalCalendar(intervals) for worker, intervals in busy.items()}
+        return schedule
+
+    def calendar(self, worker: Optional[str]) -> IntervalCalendar:
+        calendar = self._calendars.get(calendar_key(worker))
+        return calendar if calendar is not None else IntervalCalendar()
+
+    def is_free(self, start: int, duration: int, worker: Optional[str] = None) -> bool:
+        """True if the slot is inside business hours and the calendar has no overlapping booking"""
+        end = start + duration
+        if start < self.hours.open_minute or end > self.hours.close_minute:
+            return False
+        return not self.calendar(worker).overlaps(start, end)
+
+    def free_slots(self, duration: int = DEFAULT_DURATION, worker: Optional[str] = None) -> List[str]:
+        """Grid slots where an appointment of `duration` minutes fits"""
+        calendar = self.calendar(worker)
+        close = self.hours.close_minute
+        return [
+            format_time(start)
+            for start in self.hours.slot_starts()
+            if start + duration <= close and not calendar.overlaps(start, start + duration)
+        ]
+
+    def book(self, start: int, duration: int, worker: Optional[str] = None):
+        """Record a booking in memory"""
+        self._calendars.setdefault(calendar_key(worker), IntervalCalendar()).add(start, start + duration)
+        self.booking_count += 1
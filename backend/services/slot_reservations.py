@@ -0,0 +1,210 @@
+"""
+Slot Reservations
+One document per booked slot-grid unit, guarded by a unique index, so two requests can never reserve the same time
+"""
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+from math import ceil
+from typing import Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from services.codec import date_range_query, from_bson_date, to_bson_date
+from services.scheduling import BusinessHours, calendar_key, format_time, parse_time
+
+logger = logging.getLogger(__name__)
+
+RESERVATIONS_COLLECTION = "slot_reservations"
+
+DUPLICATE_KEY = 11000
+
+
+class SlotAlreadyBooked(Exception):
+    """Another appointment already holds at least one unit of the requested interval"""
+
+
+def reservation_units(day: date, start: int, duration: int, worker: Optional[str], hours: BusinessHours) -> List[Dict]:
+    """Grid units covered by [start, start + duration), rounded up to whole slot intervals"""
+    unit_count = max(1, ceil(duration / hours.slot_interval))
+    stored_day = to_bson_date(day)
+    return [
+        {"date": stored_day, "calendar": calendar_key(worker), "time": format_time(start + index * hours.slot_interval)}
+        for index in range(unit_count)
+    ]
+
+
+def _is_duplicate(error: Exception) -> bool:
+    if isinstance(error, DuplicateKeyError):
+        return True
+    if isinstance(error, BulkWriteError):
+        return any(item.get('code') == DUPLICATE_KEY for item in error.details.get('writeErrors', []))
+    return False
+
+
+async def reserve_slot(db, appointment_id: str, day: date, start: int, duration: int,
+                       worker: Optional[str], hours: BusinessHours):
+    """Atomically claim every unit of the interval or none of them"""
+    now = datetime.now(timezone.utc)
+    docs = [
+        {**unit, "appointment_id": appointment_id, "created_at": now}
+        for unit in reservation_units(day, start, duration, worker, hours)
+    ]
+    try:
+        # Ordered: stops at the first taken unit
+        await db[RESERVATIONS_COLLECTION].insert_many(docs, ordered=True)
+    except (BulkWriteError, DuplicateKeyError) as e:
+        if not _is_duplicate(e):
+            raise
+        # Roll back the units inserted before the conflict
+        await release_slot(db, appointment_id)
+        raise SlotAlreadyBooked() from e
+
+
+async def release_slot(db, appointment_id: str):
+    """Free every unit held by an appointment (cancellation or failed booking)"""
+    await db[RESERVATIONS_COLLECTION].delete_many({"appointment_id": appointment_id})
+
+
+async def backfill_reservations(db, hours: BusinessHours, active_statuses: List[str], batch_size: int = 500) -> int:
+    """Create reservations for upcoming active appointments booked before reservations existed.
+
+    Appointments are read in batches; each batch costs one lookup of the ids that already hold
+    reservations and one insert for the rest, so a re-run over reserved appointments writes nothing.
+    """
+    cursor = db.appointments.find(
+        {**date_range_query("appointment.date", datetime.now(timezone.utc).date()), "status": {"$in": active_statuses}},
+        {"_id": 0, "id": 1, "appointment.date": 1, "appointment.time": 1,
+         "appointment.duration": 1, "appointment.worker": 1}
+    ).batch_size(batch_size)
+    created = 0
+    batch = []
+    async for appt in cursor:
+        batch.append(appt)
+        if len(batch) >= batch_size:
+            created += await _backfill_batch(db, batch, hours)
+            batch = []
+    if batch:
+        created += await _backfill_batch(db, batch, hours)
+    if created:
+        logger.info("🔒 Backfilled %s slot reservations for existing appointments", created)
+    return created
+
+
+async def _backfill_batch(db, appointments: List[Dict], hours: BusinessHours) -> int:
+    # Reservations with a legacy string date do not collide with native ones in the unique index,
+    # so they do not count as reserved and are replaced below
+    reserved = set(await db[RESERVATIONS_COLLECTION].distinct(
+        "appointment_id", {"appointment_id": {"$in": [appt['id'] for appt in appointments]}, "date": {"$type": "date"}}
+    ))
+    now = datetime.now(timezone.utc)
+    docs = []
+    for appt in appointments:
+        if appt['id'] in reserved:
+            continue
+        info = appt.get('appointment') or {}
+        try:
+            units = reservation_units(
+                from_bson_date(info['date']), parse_time(info['time']), info.get('duration') or 30, info.get('worker'), hours
+            )
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+        docs.extend({**unit, "appointment_id": appt['id'], "created_at": now} for unit in units)
+    if not docs:
+        return 0
+    await db[RESERVATIONS_COLLECTION].delete_many(
+        {"appointment_id": {"$in": list({doc['appointment_id'] for doc in docs})}, "date": {"$type": "string"}}
+    )
+    try:
+        result = await db[RESERVATIONS_COLLECTION].insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        # A unit already held by another appointment (a double booking from before reservations existed)
+        if any(item.get('code') != DUPLICATE_KEY for item in e.details.get('writeErrors', [])):
+            raise
+        logger.warning("⚠️ %s slot units of existing appointments are held by other appointments; not backfilled",
+                       len(e.details.get('writeErrors', [])))
+        return e.details.get('nInserted', 0)
+
+
+
+async def backfill_calendar_keys(db, batch_size: int = 500) -> int:
+    """Store the normalised worker key on appointments saved before the staff listing filtered on it"""
+    cursor = db.appointments.find(
+        {"calendar": {"$exists": False}}, {"_id": 0, "id": 1, "appointment.worker": 1}
+    ).batch_size(batch_size)
+    updated = 0
+    batch = []
+    async for appt in cursor:
+        worker = (appt.get('appointment') or {}).get('worker')
+        batch.append(UpdateOne({"id": appt['id']}, {"$set": {"calendar": calendar_key(worker)}}))
+        if len(batch) >= batch_size:
+            updated += (await db.appointments.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await db.appointments.bulk_write(batch, ordered=False)).modified_count
+    if updated:
+        logger.info("🔒 Backfilled calendar keys for %s existing appointments", updated)
+    return updated
+
+async def release_orphaned_reservations(db, active_statuses: List[str], grace_seconds: float = 300.0) -> int:
+    """Free upcoming reservations whose appointment was never saved or is no longer active.
+
+    A booking whose insert fails releases its slot, but that release can fail too, and it is skipped on
+    purpose when the database cannot say whether the insert committed. Reservations younger than
+    `grace_seconds` belong to bookings that may still be in flight and are left alone.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=grace_seconds)
+    stale = {"date": {"$gte": to_bson_date(now.date())}, "created_at": {"$lt": cutoff}}
+    held = await db[RESERVATIONS_COLLECTION].distinct("appointment_id", stale)
+    if not held:
+        return 0
+    live = await db.appointments.distinct("id", {"id": {"$in": held}, "status": {"$in": active_statuses}})
+    orphaned = sorted(set(held) - set(live))
+    if not orphaned:
+        return 0
+    result = await db[RESERVATIONS_COLLECTION].delete_many({**stale, "appointment_id": {"$in": orphaned}})
+    logger.warning("🔓 Released %s orphaned slot reservations of %s appointments", result.deleted_count, len(orphaned))
+    return result.deleted_count
+
+
+class ReservationSweeper:
+    """Runs release_orphaned_reservations every `interval` seconds while the database is connected"""
+
+    def __init__(self, get_db: Callable, active_statuses: List[str], interval: float = 300.0, grace: float = 300.0):
+        self.get_db = get_db
+        self.active_statuses = active_statuses
+        self.interval = interval
+        self.grace = grace
+        self.released = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="reservation-sweeper")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("❌ Reservation sweep failed: %s", e)
+
+    async def sweep(self) -> int:
+        db = self.get_db()
+        if db is None:
+            return 0
+        released = await release_orphaned_reservations(db, self.active_statuses, self.grace)
+        self.released += released
+        return released
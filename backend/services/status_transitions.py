@@ -0,0 +1,68 @@
+"""
+Status Transitions
+Moves documents between statuses with one conditional find_one_and_update, so the rules live in the filter
+"""
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, Optional
+
+from pymongo import ReturnDocument
+
+# Target status -> statuses it may be reached from
+APPOINTMENT_TRANSITIONS: Dict[str, FrozenSet[str]] = {
+    "confirmed": frozenset({"pending"}),
+    "completed": frozenset({"confirmed"}),
+    "cancelled": frozenset({"pending", "confirmed"}),
+}
+
+# Timestamp recorded alongside each target status
+TRANSITION_TIMESTAMPS: Dict[str, str] = {
+    "confirmed": "confirmed_at",
+    "completed": "completed_at",
+    "cancelled": "cancelled_at",
+}
+
+
+class TransitionNotFound(Exception):
+    """No document has the given id"""
+
+
+class InvalidTransition(Exception):
+    """The document exists but its current status does not allow the transition"""
+
+    def __init__(self, current: Optional[str], target: str):
+        self.current = current
+        self.target = target
+        super().__init__(f"Cannot change status from {current} to {target}")
+
+
+async def transition_status(collection, doc_id: str, target: str,
+                            transitions: Dict[str, FrozenSet[str]] = APPOINTMENT_TRANSITIONS,
+                            projection: Optional[Dict] = None) -> Dict:
+    """Apply `target` if the current status allows it and return the updated document.
+
+    The happy path is a single round-trip; the document is only read again to tell a
+    missing id apart from a disallowed transition.
+    """
+    allowed = transitions.get(target)
+    if not allowed:
+        raise ValueError(f"Unknown target status: {target}")
+
+    now = datetime.now(timezone.utc)
+    update = {"status": target, "updated_at": now}
+    timestamp_field = TRANSITION_TIMESTAMPS.get(target)
+    if timestamp_field:
+        update[timestamp_field] = now
+
+    updated = await collection.find_one_and_update(
+        {"id": doc_id, "status": {"$in": sorted(allowed)}},
+        {"$set": update},
+        projection=projection if projection is not None else {"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if updated is not None:
+        return updated
+
+    current = await collection.find_one({"id": doc_id}, {"_id": 0, "status": 1})
+    if current is None:
+        raise TransitionNotFound(doc_id)
+    raise InvalidTransition(current.get("status"), target)
@@ -0,0 +1,216 @@
+"""
+Structured Logging
+JSON log records written by a background thread, with per-logger sampling and request-id correlation
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# Set by RequestIdMiddleware for the duration of a request; read when a record is created
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# Incoming ids are echoed into logs and headers, so only short, plain ones are trusted
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """'server=0.1,services.email_service=0.25' -> {'server': 0.1, 'services.email_service': 0.25}"""
+    rates = {}
+    for part in value.split(','):
+        if not part.strip():
+            continue
+        name, _, rate = part.partition('=')
+        rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps the current request id on the record while still on the event loop"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of INFO-and-below records per logger; warnings and errors always pass.
+
+    The rate for a logger is the one configured for its closest dotted ancestor.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+        self.dropped: Dict[str, int] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            matches = [prefix for prefix in self.rates if name == prefix or name.startswith(f"{prefix}.")]
+            rate = self.rates[max(matches, key=len)] if matches else 1.0
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.dropped[record.name] = self.dropped.get(record.name, 0) + 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id, extra fields, exception"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """The previous plain-text layout, with the request id when there is one"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        return f"[{request_id}] {line}" if request_id else line
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread without formatting them.
+
+    The stock QueueHandler formats the message and traceback in the caller so records can be
+    pickled; this queue is in-process, so that work is left to the listener. A full queue
+    drops the record instead of blocking the event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingPipeline:
+    """Root logger -> filters -> in-memory queue -> listener thread -> stdout"""
+
+    def __init__(self, handler: NonBlockingQueueHandler, listener: logging.handlers.QueueListener,
+                 sampler: SamplingFilter):
+        self.handler = handler
+        self.listener = listener
+        self.sampler = sampler
+        self._running = True
+
+    def stop(self):
+        """Flush queued records and stop the listener thread (idempotent)"""
+        if self._running:
+            self._running = False
+            self.listener.stop()
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self.handler.queue.qsize(),
+            "dropped_queue_full": self.handler.dropped,
+            "dropped_sampled": dict(self.sampler.dropped),
+        }
+
+
+def configure_logging(level: str = "INFO", fmt: str = "json", sample_rates: Optional[Dict[str, float]] = None,
+                      queue_size: int = 10000) -> LoggingPipeline:
+    """Replace the root handlers with the queue pipeline; uvicorn's loggers are routed through it too"""
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    handler = NonBlockingQueueHandler(log_queue)
+    sampler = SamplingFilter(sample_rates or {})
+    # Sampling first, so dropped records skip the request-id lookup too
+    handler.addFilter(sampler)
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    pipeline = LoggingPipeline(handler, listener, sampler)
+    # The listener thread is a daemon; flush what is queued if the process exits without a shutdown event
+    atexit.register(pipeline.stop)
+    return pipeline
+
+
+class RequestIdMiddleware:
+    """ASGI middleware: reuses a valid incoming X-Request-ID or makes one, and echoes it in the response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                incoming = value.decode("latin-1")
+                break
+        request_id = incoming if incoming and _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode())]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
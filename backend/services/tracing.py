@@ -0,0 +1,370 @@
+"""
+Request Tracing
+Lightweight spans for requests, MongoDB operations and commands, and email sends, exported as OTLP/HTTP JSON or to a JSON-lines file
+"""
+import contextlib
+import hmac
+import json
+import logging
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from pymongo import monitoring
+
+from services.metrics import command_collection, route_template
+from services.structured_logging import request_id_var
+
+logger = logging.getLogger(__name__)
+
+TRACE_ID_HEADER = "X-Trace-Id"
+FORCE_TRACE_HEADER = "X-Debug-Trace"
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+# W3C trace context: version-traceid-parentid-flags
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "_Trace", name: str, parent_id: Optional[str], kind: int, attributes: Optional[Dict]):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        self.trace.spans.append(self)
+
+    def to_otlp(self) -> Dict:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items() if value is not None],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _Trace:
+    """Spans of one trace finished in this process under one local root (a request or an outbox job)"""
+
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List[Span] = []
+
+
+def _otlp_attribute(key: str, value) -> Dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def otlp_payload(spans: List[Span], service_name: str) -> Dict:
+    """An OTLP ExportTraceServiceRequest in its JSON encoding"""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [_otlp_attribute("service.name", service_name)]},
+        "scopeSpans": [{"scope": {"name": "cardx.tracing"}, "spans": [span.to_otlp() for span in spans]}],
+    }]}
+
+
+# The innermost open span of the running task; None when the request is not sampled
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class SpanExporter(ABC):
+    """Writes finished traces from a background thread so exporting never blocks the event loop"""
+
+    def __init__(self, service_name: str, queue_size: int = 1000):
+        self.service_name = service_name
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self.exported = 0
+        self.dropped = 0
+        self.failures = 0
+
+    def submit(self, spans: List[Span]):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"{type(self).__name__}", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += len(spans)
+
+    def _run(self):
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                return
+            try:
+                self.write(otlp_payload(spans, self.service_name))
+                self.exported += len(spans)
+            except Exception as e:
+                self.failures += 1
+                logger.warning("⚠️ Trace export failed: %s", e)
+
+    @abstractmethod
+    def write(self, payload: Dict):
+        """Deliver one OTLP JSON payload; called on the exporter thread, raises on failure"""
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+class FileSpanExporter(SpanExporter):
+    """One OTLP JSON document per line, the format the collector's otlpjsonfile receiver reads"""
+
+    def __init__(self, path: str, service_name: str, queue_size: int = 1000):
+        super().__init__(service_name, queue_size)
+        self.path = path
+
+    def write(self, payload: Dict):
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(payload, separators=(",", ":")) + "\n")
+
+
+class OtlpSpanExporter(SpanExporter):
+    """POSTs OTLP/HTTP JSON to a collector, e.g. http://localhost:4318/v1/traces"""
+
+    def __init__(self, endpoint: str, service_name: str, queue_size: int = 1000, timeout: float = 5.0):
+        super().__init__(service_name, queue_size)
+        self.endpoint = endpoint
+        self._client = httpx.Client(timeout=timeout)
+
+    def write(self, payload: Dict):
+        self._client.post(self.endpoint, json=payload).raise_for_status()
+
+    def close(self):
+        super().close()
+        self._client.close()
+
+
+class Tracer:
+    """Samples requests, tracks the current span per task and hands finished traces to the exporter.
+
+    Unsampled requests create no spans at all, so `span()` costs one context-variable lookup.
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter] = None, sample_rate: float = 0.0, force_token: str = ""):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.force_token = force_token
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def forced(self, header_value: Optional[str]) -> bool:
+        """X-Debug-Trace forces sampling only when it carries TRACE_FORCE_TOKEN"""
+        if not self.force_token or not header_value:
+            return False
+        return hmac.compare_digest(header_value.encode(), self.force_token.encode())
+
+    @contextlib.contextmanager
+    def root(self, name: str, kind: int = KIND_INTERNAL, attributes: Optional[Dict] = None,
+             parent: Optional[Dict] = None) -> Iterator[Span]:
+        """Start a local root span, continuing `parent` ({'trace_id', 'span_id'}) when given"""
+        trace = _Trace(parent["trace_id"] if parent else secrets.token_hex(16))
+        span = Span(trace, name, parent["span_id"] if parent else None, kind, attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            current_span.reset(token)
+            span.end()
+            if self.exporter is not None:
+                self.exporter.submit(list(trace.spans))
+
+    @contextlib.contextmanager
+    def span(self, name: str, attributes: Optional[Dict] = None, kind: int = KIND_INTERNAL) -> Iterator[Optional[Span]]:
+        """Child of the current span; a no-op yielding None outside a sampled trace"""
+        parent = current_span.get()
+        if parent is None:
+            yield None
+            return
+        span = Span(parent.trace, name, parent.span_id, kind, attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            current_span.reset(token)
+            span.end()
+
+    def close(self):
+        if self.exporter is not None:
+            self.exporter.close()
+
+    def stats(self) -> Dict:
+        if self.exporter is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "sample_rate": self.sample_rate,
+            "exported_spans": self.exporter.exported,
+            "dropped_spans": self.exporter.dropped,
+            "export_failures": self.exporter.failures,
+        }
+
+
+# Process-wide tracer; disabled until configure_tracing() installs an exporter
+tracer = Tracer()
+
+
+def configure_tracing(exporter: str = "none", sample_rate: float = 0.0, force_token: str = "",
+                      file_path: str = "traces.jsonl", otlp_endpoint: str = "http://localhost:4318/v1/traces",
+                      service_name: str = "cardx-backend") -> Tracer:
+    if exporter == "file":
+        tracer.exporter = FileSpanExporter(file_path, service_name)
+    elif exporter == "otlp":
+        tracer.exporter = OtlpSpanExporter(otlp_endpoint, service_name)
+    elif exporter != "none":
+        raise ValueError("TRACE_EXPORTER must be one of none, file, otlp")
+    tracer.sample_rate = sample_rate
+    tracer.force_token = force_token
+    return tracer
+
+
+def span(name: str, attributes: Optional[Dict] = None, kind: int = KIND_INTERNAL):
+    """Child span of the current trace (no-op when the current request is not sampled)"""
+    return tracer.span(name, attributes, kind)
+
+
+class MongoCommandTracer(monitoring.CommandListener):
+    """A client span per command the driver sends, under whatever span is current when it is sent.
+
+    DataAccess spans cover one logical call, which may send several commands (a transaction, cursor
+    batches); this also covers code that does not go through DataAccess, such as outbox workers and
+    streamed exports. Motor runs the driver in a thread with a copy of the caller's context, so the
+    current span is visible here. Commands outside a sampled trace cost one context-variable lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open: Dict[Tuple, Span] = {}
+
+    def started(self, event):
+        parent = current_span.get()
+        if parent is None:
+            return
+        command_span = Span(parent.trace, f"mongodb {event.command_name}", parent.span_id, KIND_CLIENT, {
+            "db.system": "mongodb",
+            "db.name": event.database_name,
+            "db.operation": event.command_name,
+            "db.mongodb.collection": command_collection(event),
+        })
+        with self._lock:
+            self._open[(event.connection_id, event.request_id)] = command_span
+
+    def _finish(self, event, error: Optional[str] = None):
+        with self._lock:
+            command_span = self._open.pop((event.connection_id, event.request_id), None)
+        if command_span is not None:
+            command_span.error = error
+            command_span.end()
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event, error=str(event.failure.get("codeName") or event.failure.get("errtype") or "failed"))
+
+
+def current_context() -> Optional[Dict]:
+    """Trace context to store with deferred work (outbox jobs) so it continues the same trace"""
+    active = current_span.get()
+    if active is None:
+        return None
+    return {"trace_id": active.trace.trace_id, "span_id": active.span_id}
+
+
+def _parse_traceparent(value: Optional[str]):
+    match = _TRACEPARENT.match(value or "")
+    if not match:
+        return None, False
+    trace_id, span_id, flags = match.groups()
+    return {"trace_id": trace_id, "span_id": span_id}, bool(int(flags, 16) & 1)
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per sampled request and returning its id in X-Trace-Id"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        force_header = FORCE_TRACE_HEADER.lower().encode()
+        headers = {name: value.decode("latin-1") for name, value in scope["headers"]
+                   if name in (b"traceparent", force_header)}
+        parent, parent_sampled = _parse_traceparent(headers.get(b"traceparent"))
+        forced = tracer.forced(headers.get(force_header))
+        if not (forced or parent_sampled or random.random() < tracer.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        attributes = {"http.method": method, "http.target": scope["path"], "request.id": request_id_var.get()}
+        if forced:
+            attributes["trace.forced"] = True
+        with tracer.root(method, KIND_SERVER, attributes, parent) as root:
+
+            async def send_with_trace_id(message):
+                if message["type"] == "http.response.start":
+                    root.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        root.error = f"HTTP {message['status']}"
+                    message["headers"] = [*message.get("headers", []), (b"x-trace-id", root.trace.trace_id.encode())]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace_id)
+            finally:
+                route = route_template(scope)
+                root.name = f"{method} {route}"
+                root.set_attribute("http.route", route)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Booking rules test.
+Drives the appointment API in-process against mongomock-motor and checks the rules a booking must obey.
+Run with: python test_booking_rules.py
+No database, server or Resend key needed.
+"""
+import asyncio
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+# Configure the app before it is imported: quiet logs, a throwaway database, no tracing
+os.environ["LOG_LEVEL"] = os.environ.get("TEST_LOG_LEVEL", "CRITICAL")
+os.environ["TRACE_EXPORTER"] = "none"
+os.environ["DB_NAME"] = f"cardx_rules_{os.getpid()}"
+os.environ["ADMIN_API_KEY"] = ADMIN_KEY = "rules-admin-key"
+
+import httpx
+from pymongo.errors import NetworkTimeout
+
+import server
+from mock_mongo import connect_mock
+from services.codec import to_bson_date
+from services.slot_reservations import (
+    RESERVATIONS_COLLECTION, backfill_calendar_keys, backfill_reservations, release_orphaned_reservations,
+)
+
+
+def booking(day: date, slot_time: str, worker=None, duration=30):
+    return {
+        "customer": {"name": "Rules Test", "email": "rules@example.com", "phone": "+250788123456"},
+        "appointment": {
+            "date": day.isoformat(),
+            "time": slot_time,
+            "service_type": "general_inquiry",
+            "duration": duration,
+            "worker": worker,
+        },
+    }
+
+
+async def check_worker_names_share_a_calendar(http, day):
+    """'Alice' and ' alice' are one consultant: the second booking of her 10:00 slot is refused"""
+    first = await http.post("/api/appointments", json=booking(day, "10:00", "Alice"))
+    second = await http.post("/api/appointments", json=booking(day, "10:00", " alice"))
+    other = await http.post("/api/appointments", json=booking(day, "10:00", "Bob"))
+    slots = await http.get("/api/appointments/available-slots", params={
+        "date_str": day.isoformat(), "service_type": "general_inquiry", "worker": "ALICE",
+    })
+    problems = []
+    if first.status_code != 201:
+        problems.append(f"first booking returned {first.status_code}")
+    if second.status_code != 400:
+        problems.append(f"case-variant booking returned {second.status_code}, expected 400")
+    if other.status_code != 201:
+        problems.append(f"another consultant's booking returned {other.status_code}")
+    if "10:00" in slots.json().get("available_slots", []):
+        problems.append("10:00 still offered for ALICE")
+    return problems
+
+
+async def check_staff_transitions_need_admin_key(http, day):
+    """Only staff confirm or complete an appointment"""
+    created = await http.post("/api/appointments", json=booking(day, "11:00"))
+    appointment_id = created.json().get("id")
+    problems = []
+    for target in ("confirm", "complete"):
+        for headers in ({}, {"X-Admin-Key": "wrong"}):
+            response = await http.patch(f"/api/appointments/{appointment_id}/{target}", headers=headers)
+            if response.status_code != 401:
+                problems.append(f"{target} {'with a wrong key' if headers else 'without a key'} returned {response.status_code}")
+    stored = await server.db.appointments.find_one({"id": appointment_id})
+    if stored["status"] != "pending":
+        problems.append(f"appointment became {stored['status']} without a key")
+    for target, status in (("confirm", "confirmed"), ("complete", "completed")):
+        response = await http.patch(f"/api/appointments/{appointment_id}/{target}", headers={"X-Admin-Key": ADMIN_KEY})
+        if response.status_code != 200 or response.json().get("status") != status:
+            problems.append(f"{target} with the admin key returned {response.status_code}")
+    return problems
+
+
+async def failing_insert(commits: bool, delay: float):
+    """An insert_with_outbox that answers with a timeout after `delay`, having committed first when `commits`.
+
+    The write runs in its own task, as it would in the driver, so it still lands if the caller gives up on it.
+    """
+    real_insert = server.email_dispatcher.insert_with_outbox
+
+    async def write(collection, doc, jobs):
+        await asyncio.sleep(delay)
+        if commits:
+            await real_insert(collection, doc, jobs)
+        raise NetworkTimeout("timed out waiting for the reply")
+
+    async def insert_with_outbox(collection, doc, jobs):
+        await asyncio.shield(asyncio.ensure_future(write(collection, doc, jobs)))
+
+    return insert_with_outbox
+
+
+async def book_with_failing_insert(http, day, slot_time, commits):
+    deadline = server.data_access.write_deadline
+    server.data_access.write_deadline = 0.2
+    server.email_dispatcher.insert_with_outbox = await failing_insert(commits, delay=0.4)
+    try:
+        response = await http.post("/api/appointments", json=booking(day, slot_time))
+        # Let a write the request gave up on finish before looking at the database
+        await asyncio.sleep(0.5)
+    finally:
+        server.data_access.write_deadline = deadline
+        del server.email_dispatcher.insert_with_outbox
+    return response
+
+
+async def check_write_committing_after_its_deadline(http, day):
+    """A booking whose insert commits after the write deadline keeps its slot and is reported as booked"""
+    response = await book_with_failing_insert(http, day, "09:00", commits=True)
+    stored = await server.db.appointments.count_documents({"appointment.date": to_bson_date(day)})
+    held = await server.db[RESERVATIONS_COLLECTION].count_documents({"date": to_bson_date(day), "time": "09:00"})
+    again = await http.post("/api/appointments", json=booking(day, "09:00"))
+    problems = []
+    if response.status_code != 201:
+        problems.append(f"booking returned {response.status_code}, expected 201 for a saved appointment")
+    if stored != 1:
+        problems.append(f"{stored} appointments stored")
+    if not held:
+        problems.append("slot of the saved appointment was released")
+    if again.status_code != 400:
+        problems.append(f"second booking of the slot returned {again.status_code}, expected 400")
+    return problems
+
+
+async def check_write_failing_after_its_deadline(http, day):
+    """A booking whose insert never commits answers 503 and frees its slot for the next customer"""
+    response = await book_with_failing_insert(http, day, "09:00", commits=False)
+    held = await server.db[RESERVATIONS_COLLECTION].count_documents({"date": to_bson_date(day), "time": "09:00"})
+    again = await http.post("/api/appointments", json=booking(day, "09:00"))
+    problems = []
+    if response.status_code != 503:
+        problems.append(f"booking returned {response.status_code}, expected 503")
+    if held:
+        problems.append("slot stayed reserved for an appointment that was never saved")
+    if again.status_code != 201:
+        problems.append(f"next booking of the slot returned {again.status_code}, expected 201")
+    return problems
+
+
+async def check_orphaned_reservations_are_swept(http, day):
+    """The sweep frees reservations of appointments that do not exist and keeps those of live bookings"""
+    live = await http.post("/api/appointments", json=booking(day, "14:00"))
+    await server.db[RESERVATIONS_COLLECTION].insert_one({
+        "date": to_bson_date(day), "calendar": None, "time": "15:00",
+        "appointment_id": "never-saved", "created_at": datetime.now(timezone.utc) - timedelta(hours=1),
+    })
+    released = await release_orphaned_reservations(server.db, server.ACTIVE_STATUSES, grace_seconds=0)
+    remaining = await server.db[RESERVATIONS_COLLECTION].distinct("time", {"date": to_bson_date(day)})
+    problems = []
+    if live.status_code != 201:
+        problems.append(f"booking returned {live.status_code}")
+    if released != 1:
+        problems.append(f"released {released} reservations, expected 1")
+    if remaining != ["14:00"]:
+        problems.append(f"reservations left at {remaining}, expected only 14:00")
+    return problems
+
+
+async def check_legacy_string_dates_block_their_slot(http, day):
+    """A booking stored before the date migration ('YYYY-MM-DD' string) still occupies its slot"""
+    await server.db.appointments.insert_one({
+        "id": f"legacy-{day.isoformat()}", "status": "confirmed",
+        "appointment": {"date": day.isoformat(), "time": "10:00", "duration": 30, "worker": None},
+    })
+    slots = await http.get("/api/appointments/available-slots", params={
+        "date_str": day.isoformat(), "service_type": "general_inquiry",
+    })
+    availability = await http.get("/api/appointments/availability", params={
+        "start_date": day.isoformat(), "end_date": day.isoformat(), "service_type": "general_inquiry",
+    })
+    await backfill_reservations(server.db, server.business_hours, server.ACTIVE_STATUSES)
+    clash = await http.post("/api/appointments", json=booking(day, "10:00"))
+    problems = []
+    if "10:00" in slots.json().get("available_slots", []):
+        problems.append("10:00 offered by available-slots")
+    if "10:00" in availability.json()["days"][0]["available_slots"]:
+        problems.append("10:00 offered by the availability range")
+    if clash.status_code != 400:
+        problems.append(f"booking over the legacy appointment returned {clash.status_code}, expected 400")
+    return problems
+
+
+async def check_staff_worker_filter_ignores_case(http, day):
+    """Listing for 'alice' finds the bookings made for 'Alice', including ones saved before the key existed"""
+    booked = await http.post("/api/appointments", json=booking(day, "09:00", "Alice"))
+    await http.post("/api/appointments", json=booking(day, "09:00", "Bob"))
+    await server.db.appointments.insert_one({
+        "id": f"legacy-worker-{day.isoformat()}", "status": "confirmed",
+        "customer": {"name": "Rules Test", "email": "rules@example.com", "phone": "+250788123456"},
+        "appointment": {"date": to_bson_date(day), "time": "11:00", "service_type": "general_inquiry",
+                        "duration": 30, "worker": "ALICE "},
+        "created_at": datetime.now(timezone.utc),
+    })
+    await backfill_calendar_keys(server.db)
+    listed = await http.get("/api/appointments", headers={"X-Admin-Key": ADMIN_KEY}, params={
+        "start_date": day.isoformat(), "end_date": day.isoformat(), "worker": " alice",
+    })
+    problems = []
+    if listed.status_code != 200:
+        return [f"listing returned {listed.status_code}"]
+    found = sorted(appt["id"] for appt in listed.json())
+    expected = sorted([booked.json().get("id"), f"legacy-worker-{day.isoformat()}"])
+    if found != expected:
+        problems.append(f"listed {found}, expected {expected}")
+    return problems
+
+
+async def check_parallel_bookings_of_one_slot(http, day):
+    """Of many bookings racing for one slot, exactly one wins and the rest are refused"""
+    responses = await asyncio.gather(*(
+        http.post("/api/appointments", json=booking(day, "15:00", duration=60)) for _ in range(20)
+    ))
+    statuses = sorted(response.status_code for response in responses)
+    winners = await server.db.appointments.count_documents({"appointment.date": to_bson_date(day)})
+    units = await server.db[RESERVATIONS_COLLECTION].count_documents({"date": to_bson_date(day)})
+    problems = []
+    if statuses != [201] + [400] * 19:
+        problems.append(f"status codes {statuses}, expected one 201 and nineteen 400")
+    if winners != 1:
+        problems.append(f"{winners} appointments saved for the slot")
+    if units != 2:
+        problems.append(f"{units} reservation units held, expected 2 for one 60-minute booking")
+    return problems
+
+
+CHECKS = [
+    check_worker_names_share_a_calendar,
+    check_staff_transitions_need_admin_key,
+    check_write_committing_after_its_deadline,
+    check_write_failing_after_its_deadline,
+    check_orphaned_reservations_are_swept,
+    check_legacy_string_dates_block_their_slot,
+    check_staff_worker_filter_ignores_case,
+    check_parallel_bookings_of_one_slot,
+]
+
+
+async def run():
+    await connect_mock(server)
+
+    failures = 0
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        for offset, check in enumerate(CHECKS):
+            # Each check books on its own day so they cannot interfere
+            day = date.today() + timedelta(days=30 + offset)
+            problems = await check(http, day)
+            if problems:
+                failures += 1
+                print(f"❌ FAIL {check.__name__}: {'; '.join(problems)}")
+            else:
+                print(f"✅ PASS {check.__name__}")
+    return failures
+
+
+def main():
+    failures = asyncio.run(run())
+    print(f"\n{len(CHECKS) - failures}/{len(CHECKS)} checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
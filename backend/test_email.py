@@ -3,6 +3,7 @@ Test script to verify Resend email service is working
 Run this to test your email setup before using it in production
 """
 import os
+import asyncio
 from dotenv import load_dotenv
 from pathlib import Path
 from services.email_service import EmailService
@@ -36,7 +37,7 @@ def test_email_service():
     print(f"\n📧 Sending test email to {test_email}...")
     
     # Send test email
-    success = email_service._send_email(
+    success = asyncio.run(email_service._send_email(
         to=test_email,
         subject="✅ Resend Test - CardX Academia",
         html_content="""
@@ -73,7 +74,7 @@ def test_email_service():
         </body>
         </html>
         """
-    )
+    ))
     
     if success:
         print("✅ Test email sent successfully!")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Batching test for the email outbox.
+Queues more outbox jobs than there are dispatcher workers and checks that the batcher submits them
+in batches larger than the worker count, and that every job ends up sent. Also checks that a batch
+reply mixing accepted and rejected emails hands each caller its own id or error.
+Run with: python test_email_batching.py [--jobs 60] [--workers 4]
+No database or Resend key needed: runs against mongomock-motor and a stub transport.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from mongomock_motor import AsyncMongoMockClient
+
+from services.email_batcher import EmailBatcher
+from services.email_outbox import OUTBOX_COLLECTION, EmailDispatcher, build_outbox_jobs
+from services.email_transport import ResendError
+
+
+class StubTransport:
+    """Accepts every email and records the size of each request"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def send(self, params):
+        self.requests.append(1)
+        return {"id": "single"}
+
+    async def send_batch(self, messages):
+        self.requests.append(len(messages))
+        return {"data": [{"id": f"batch-{index}"} for index in range(len(messages))]}
+
+
+class PartlyRejectingTransport:
+    """Rejects recipients on the reject list and answers like Resend: ids for accepted emails, errors by index"""
+
+    def __init__(self, rejected):
+        self.rejected = rejected
+
+    async def send(self, params):
+        raise AssertionError("expected a batch request")
+
+    async def send_batch(self, messages):
+        return {
+            "data": [{"id": f"id-{params['to']}"} for params in messages if params["to"] not in self.rejected],
+            "errors": [
+                {"index": index, "message": f"invalid recipient {params['to']}"}
+                for index, params in enumerate(messages) if params["to"] in self.rejected
+            ],
+        }
+
+
+class BatchingEmailService:
+    """The EmailService surface the dispatcher uses, sending through a real EmailBatcher"""
+
+    admin_email = None
+
+    def __init__(self, batcher):
+        self.batcher = batcher
+
+    async def send_appointment_confirmation(self, appointment):
+        await self.batcher.submit({"to": appointment["customer"]["email"], "subject": "Appointment Confirmed"})
+        return True
+
+
+async def run(jobs: int, workers: int, claim_batch: int, window: float):
+    client = AsyncMongoMockClient(tz_aware=True)
+    db = client["cardx_email_batching_test"]
+    transport = StubTransport()
+    batcher = EmailBatcher(transport, window=window)
+    dispatcher = EmailDispatcher(
+        BatchingEmailService(batcher), get_client=lambda: client, get_db=lambda: db,
+        workers=workers, claim_batch=claim_batch, poll_interval=0.05,
+    )
+
+    outbox = []
+    for index in range(jobs):
+        doc = {"id": f"appointment-{index}", "customer": {"email": f"customer{index}@example.com"}}
+        outbox.extend(build_outbox_jobs("appointments", doc, [("appointment_confirmation", False)]))
+    await db[OUTBOX_COLLECTION].insert_many(outbox)
+
+    started = time.perf_counter()
+    dispatcher.start()
+    try:
+        while await db[OUTBOX_COLLECTION].count_documents({"status": {"$ne": "sent"}}) and time.perf_counter() - started < 10:
+            await asyncio.sleep(0.05)
+    finally:
+        await dispatcher.stop()
+        await batcher.aclose()
+    sent = await db[OUTBOX_COLLECTION].count_documents({"status": "sent"})
+    return transport.requests, sent, time.perf_counter() - started
+
+
+async def run_partial_failures(count: int = 8):
+    """Submit one batch where every third email is rejected; return one problem string per wrong result"""
+    recipients = [f"customer{index}@example.com" for index in range(count)]
+    rejected = set(recipients[1::3])
+    batcher = EmailBatcher(PartlyRejectingTransport(rejected), window=0.05)
+    results = await asyncio.gather(
+        *(batcher.submit({"to": recipient, "subject": "Appointment Confirmed"}) for recipient in recipients),
+        return_exceptions=True,
+    )
+    await batcher.aclose()
+    problems = []
+    for index, (recipient, result) in enumerate(zip(recipients, results)):
+        if recipient in rejected:
+            if not (isinstance(result, ResendError) and f"item {index} " in str(result) and recipient in str(result)):
+                problems.append(f"{recipient} got {result!r}, expected its own rejection")
+        elif result != {"id": f"id-{recipient}"}:
+            problems.append(f"{recipient} got {result!r}, expected id-{recipient}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that outbox emails are batched beyond the worker count")
+    parser.add_argument("--jobs", type=int, default=60, help="Outbox jobs to queue")
+    parser.add_argument("--workers", type=int, default=4, help="Dispatcher workers")
+    parser.add_argument("--claim-batch", type=int, default=10, help="Jobs each worker claims at once")
+    parser.add_argument("--window-ms", type=float, default=250, help="Batch window")
+    args = parser.parse_args()
+
+    requests, sent, elapsed = asyncio.run(run(args.jobs, args.workers, args.claim_batch, args.window_ms / 1000))
+    print(f"{sent}/{args.jobs} jobs sent in {elapsed:.2f}s over {len(requests)} Resend requests: {requests}")
+
+    ok = True
+    if sent != args.jobs:
+        print(f"❌ FAIL: {args.jobs - sent} jobs were not sent")
+        ok = False
+    largest = max(requests, default=0)
+    if largest <= args.workers:
+        print(f"❌ FAIL: largest batch had {largest} emails, no more than the {args.workers} workers")
+        ok = False
+    if ok:
+        print(f"✅ PASS: largest batch had {largest} emails with {args.workers} workers")
+
+    problems = asyncio.run(run_partial_failures())
+    if problems:
+        print(f"❌ FAIL: partly rejected batch: {'; '.join(problems)}")
+        ok = False
+    else:
+        print("✅ PASS: partly rejected batch gave each caller its own id or error")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Constant-memory test for the streaming pilgrimage export.
+Exports synthetic collections of increasing size through the CSV and NDJSON generators and checks
+that peak traced memory does not grow with the number of documents.
+Run with: python test_export_memory.py [--sizes 2000 20000 80000]
+No database needed: a lazy fake cursor yields documents one at a time like a Motor cursor.
+"""
+import argparse
+import asyncio
+import sys
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from services.export import csv_chunks, ndjson_record, select_columns
+from services.pagination import ndjson_lines
+
+# Columns the tour operator asks for, as selected through ?columns=
+COLUMNS = "id,customer,booking.emergencyContactName,booking.emergencyContactPhone,booking.dietaryRequirements,created_at"
+AVAILABLE = [
+    "id", "customer.fullName", "customer.email", "customer.phone", "customer.passportNumber",
+    "customer.passportExpiryDate", "customer.nationality", "booking.emergencyContactName",
+    "booking.emergencyContactPhone", "booking.dietaryRequirements", "status", "created_at",
+]
+
+# Peak may grow by at most this factor while the collection grows 40x
+ALLOWED_GROWTH = 1.5
+
+
+class LazyCursor:
+    """Generates documents on demand; nothing about the collection is held in memory"""
+
+    def __init__(self, count):
+        self.count = count
+        self.index = 0
+        self.start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.index >= self.count:
+            raise StopAsyncIteration
+        i = self.index
+        self.index += 1
+        if i % 1000 == 0:
+            # Let the loop run, as a real driver does between batches
+            await asyncio.sleep(0)
+        return {
+            "id": f"booking-{i:08d}",
+            "customer": {
+                "fullName": f"Pilgrim Number {i}",
+                "email": f"pilgrim{i}@example.com",
+                "phone": f"+25078{i:07d}",
+                "passportNumber": f"PC{i:07d}",
+                "passportExpiryDate": "2031-05-01",
+                "nationality": "Rwandan",
+            },
+            "booking": {
+                "emergencyContactName": f"Contact {i}",
+                "emergencyContactPhone": f"+25072{i:07d}",
+                "dietaryRequirements": "Vegetarian, no nuts" if i % 3 == 0 else None,
+            },
+            "status": "pending",
+            "created_at": self.start + timedelta(seconds=i),
+        }
+
+    async def close(self):
+        pass
+
+
+async def export_size(fmt, count):
+    columns = select_columns(COLUMNS, AVAILABLE)
+    cursor = LazyCursor(count)
+    if fmt == "csv":
+        chunks = csv_chunks(cursor, columns)
+    else:
+        chunks = ndjson_lines(cursor, ndjson_record)
+    total_bytes = 0
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    # Consume like StreamingResponse: each chunk is sent and dropped
+    async for chunk in chunks:
+        total_bytes += len(chunk)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, total_bytes
+
+
+def run(sizes):
+    ok = True
+    for fmt in ("csv", "ndjson"):
+        peaks = []
+        for count in sizes:
+            peak, total_bytes = asyncio.run(export_size(fmt, count))
+            peaks.append(peak)
+            print(f"  {fmt:6} {count:>8} docs -> {total_bytes / 1e6:8.1f} MB written, peak {peak / 1024:8.1f} KiB")
+        growth = peaks[-1] / peaks[0]
+        passed = growth <= ALLOWED_GROWTH
+        ok = ok and passed
+        print(f"{'PASS' if passed else 'FAIL'}: {fmt} peak grew {growth:.2f}x for {sizes[-1] // sizes[0]}x the documents")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that exports stream in constant memory")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 20000, 80000])
+    args = parser.parse_args()
+    print("=== Streaming export memory test ===")
+    sys.exit(0 if run(sorted(args.sizes)) else 1)
+
+
+if __name__ == "__main__":
+    main()
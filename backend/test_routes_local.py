@@ -54,10 +54,10 @@ def main():
     }
     test("pilgrimage-bookings POST", "POST", "/api/pilgrimage-bookings", json=body)
     
-    # 5. GET /api/pilgrimage-bookings (should 405 - no GET on collection)
-    test("pilgrimage-bookings GET (expect 405)", "GET", "/api/pilgrimage-bookings")
+    # 5. GET /api/pilgrimage-bookings (admin listing - 401 without X-Admin-Key, 503 if ADMIN_API_KEY is unset)
+    test("pilgrimage-bookings GET (expect 401/503)", "GET", "/api/pilgrimage-bookings")
     
-    print("\n=== If all return 200/201 (or 405 for GET pilgrimage), routes and backend are OK. ===")
+    print("\n=== If all return 200/201 (or 401/503 for GET pilgrimage), routes and backend are OK. ===")
     print("If CONNECTION REFUSED: start backend with:")
     print("  cd backend")
     print("  uvicorn server:app --reload --port 8000")
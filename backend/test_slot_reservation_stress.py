@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for slot reservation.
+Fires many parallel bookings at one slot and checks that exactly one succeeds.
+Run with: python test_slot_reservation_stress.py [--requests 50] [--base http://localhost:8000]
+Ensure backend is running: uvicorn server:app --reload --port 8000
+"""
+import argparse
+import random
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+
+
+def book(base, slot_date, slot_time, index):
+    body = {
+        "customer": {
+            "name": f"Stress Test {index}",
+            "email": f"stress{index}@example.com",
+            "phone": "+250788123456"
+        },
+        "appointment": {
+            "date": slot_date,
+            "time": slot_time,
+            "service_type": "general_inquiry",
+            "duration": 60,
+            "notes": "slot reservation stress test"
+        }
+    }
+    try:
+        r = requests.post(f"{base}/api/appointments", json=body, timeout=30)
+        return r.status_code, (r.json().get("id") if r.status_code == 201 else None)
+    except requests.exceptions.RequestException as e:
+        return f"error: {type(e).__name__}", None
+
+
+def run_stress(base, total):
+    # A random far-future weekday keeps repeated runs from colliding with each other or real bookings
+    day = date.today() + timedelta(days=random.randint(400, 4000))
+    if day.weekday() >= 5:
+        day += timedelta(days=7 - day.weekday())  # Saturday or Sunday -> the following Monday
+    slot_date = day.isoformat()
+    slot_time = "10:00"
+    print(f"Booking {slot_date} {slot_time} with {total} concurrent requests...")
+
+    with ThreadPoolExecutor(max_workers=total) as pool:
+        results = list(pool.map(lambda i: book(base, slot_date, slot_time, i), range(total)))
+
+    statuses = Counter(status for status, _ in results)
+    created = [appointment_id for status, appointment_id in results if status == 201]
+    print(f"  Status codes: {dict(statuses)}")
+
+    # An overlapping booking (10:30 inside the 60-minute 10:00 booking) must also be rejected
+    overlap_status, overlap_id = book(base, slot_date, "10:30", total)
+    print(f"  Overlapping 10:30 booking -> {overlap_status}")
+
+    # Clean up so the slot is free again
+    for appointment_id in created + ([overlap_id] if overlap_id else []):
+        requests.patch(f"{base}/api/appointments/{appointment_id}/cancel", timeout=30)
+
+    ok = len(created) == 1 and statuses.get(400, 0) == total - 1 and overlap_status == 400
+    print("PASS: exactly one booking won the slot" if ok else "FAIL: slot was double booked or requests errored")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel booking stress test for one slot")
+    parser.add_argument("--base", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    try:
+        requests.get(f"{args.base}/api/", timeout=10)
+    except requests.exceptions.ConnectionError:
+        print(f"CONNECTION REFUSED (is backend running on {args.base}?)")
+        sys.exit(2)
+
+    sys.exit(0 if run_stress(args.base, args.requests) else 1)
+
+
+if __name__ == "__main__":
+    main()
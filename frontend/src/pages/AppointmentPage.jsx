@@ -17,12 +17,14 @@ import { appointmentAPI } from '@/services/api';
 import TopBar from '../components/TopBar';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
-import { format } from 'date-fns';
+import { format, startOfMonth, endOfMonth } from 'date-fns';
 
 const AppointmentPage = () => {
   const [selectedDate, setSelectedDate] = useState(new Date());
   const [selectedTime, setSelectedTime] = useState('');
   const [availableSlots, setAvailableSlots] = useState([]);
+  const [visibleMonth, setVisibleMonth] = useState(new Date());
+  const [fullyBookedDates, setFullyBookedDates] = useState(new Set());
   const [loadingSlots, setLoadingSlots] = useState(false);
   const [submitting, setSubmitting] = useState(false);
   const [submitted, setSubmitted] = useState(false);
@@ -61,7 +63,7 @@ const AppointmentPage = () => {
     description: '',
   });
 
-  // Workers/Consultants list - removed, using "Any Available Consultant" only
+  // Workers/Consultants list - removed; bookings go to the shared calendar and staff assign a consultant
 
   // Service types
   const serviceTypes = [
@@ -72,6 +74,9 @@ const AppointmentPage = () => {
     { value: 'general_inquiry', label: 'General Inquiry' },
   ];
 
+  // The consultant whose calendar is checked; null books into the shared calendar
+  const selectedWorker = formData.worker && formData.worker !== 'any' ? formData.worker : null;
+
   const loadAvailableSlots = useCallback(async () => {
     if (!selectedDate) return;
     
@@ -79,7 +84,9 @@ const AppointmentPage = () => {
     setError(null);
     try {
       const dateStr = format(selectedDate, 'yyyy-MM-dd');
-      const data = await appointmentAPI.getAvailableSlots(dateStr, formData.serviceType, formData.appointmentType);
+      const data = await appointmentAPI.getAvailableSlots(
+        dateStr, formData.serviceType, formData.appointmentType, formData.duration, selectedWorker
+      );
       setAvailableSlots(data.available_slots || []);
       
       // If selected time is no longer available, clear it
@@ -115,7 +122,31 @@ const AppointmentPage = () => {
     } finally {
       setLoadingSlots(false);
     }
-  }, [selectedDate, formData.serviceType, formData.appointmentType, selectedTime]);
+  }, [selectedDate, formData.serviceType, formData.appointmentType, formData.duration, selectedWorker, selectedTime]);
+
+  // Load the whole visible month in one request so fully booked days can be disabled
+  useEffect(() => {
+    const loadMonthAvailability = async () => {
+      try {
+        const data = await appointmentAPI.getAvailabilityRange(
+          format(startOfMonth(visibleMonth), 'yyyy-MM-dd'),
+          format(endOfMonth(visibleMonth), 'yyyy-MM-dd'),
+          formData.serviceType,
+          formData.appointmentType,
+          formData.duration,
+          selectedWorker
+        );
+        setFullyBookedDates(new Set(
+          (data.days || []).filter((day) => day.available_count === 0).map((day) => day.date)
+        ));
+      } catch (err) {
+        // The month overview is optional; slots for the selected day still load on their own
+        console.error('Error loading month availability:', err);
+        setFullyBookedDates(new Set());
+      }
+    };
+    loadMonthAvailability();
+  }, [visibleMonth, formData.serviceType, formData.appointmentType, formData.duration, selectedWorker]);
 
   // Load available slots when date or service type changes
   useEffect(() => {
@@ -167,7 +198,7 @@ const AppointmentPage = () => {
           time: selectedTime,
           appointment_type: formData.appointmentType,
           location: formData.appointmentType === 'in_person' ? formData.location : null,
-          worker: formData.worker && formData.worker !== 'any' ? formData.worker : null,
+          worker: selectedWorker,
           service_type: formData.serviceType,
           duration: formData.duration,
           notes: formData.description,
@@ -210,11 +241,11 @@ const AppointmentPage = () => {
     }
   };
 
-  // Disable past dates
+  // Disable past and fully booked dates
   const isDateDisabled = (date) => {
     const today = new Date();
     today.setHours(0, 0, 0, 0);
-    return date < today;
+    return date < today || fullyBookedDates.has(format(date, 'yyyy-MM-dd'));
   };
 
   return (
@@ -278,6 +309,8 @@ const AppointmentPage = () => {
                     mode="single"
                     selected={selectedDate}
                     onSelect={handleDateSelect}
+                    month={visibleMonth}
+                    onMonthChange={setVisibleMonth}
                     disabled={isDateDisabled}
                     className="rounded-md border"
                   />
@@ -362,7 +395,7 @@ const AppointmentPage = () => {
                     <SelectValue placeholder="Select a consultant" />
                   </SelectTrigger>
                   <SelectContent>
-                    <SelectItem value="any">Any Available Consultant</SelectItem>
+                    <SelectItem value="any">No preference (our team assigns a consultant)</SelectItem>
                   </SelectContent>
                 </Select>
               </div>
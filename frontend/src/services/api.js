@@ -56,13 +56,36 @@ export const appointmentAPI = {
   },
 
   // Get available time slots for a date
-  getAvailableSlots: async (date, serviceType, appointmentType = 'in_person') => {
+  getAvailableSlots: async (date, serviceType, appointmentType = 'in_person', duration = 30, worker = null) => {
     try {
       const response = await api.get('/api/appointments/available-slots', {
         params: { 
           date_str: date, 
           service_type: serviceType,
-          appointment_type: appointmentType
+          appointment_type: appointmentType,
+          duration,
+          // Omitted when null: the shared general calendar for unassigned bookings, which is
+          // separate from the named consultants' calendars (not "any free consultant")
+          worker
+        },
+      });
+      return response.data;
+    } catch (error) {
+      throw error.response?.data || { message: error.message };
+    }
+  },
+
+  // Get available time slots for every day in a date range (one request per month view)
+  getAvailabilityRange: async (startDate, endDate, serviceType, appointmentType = 'in_person', duration = 30, worker = null) => {
+    try {
+      const response = await api.get('/api/appointments/availability', {
+        params: {
+          start_date: startDate,
+          end_date: endDate,
+          service_type: serviceType,
+          appointment_type: appointmentType,
+          duration,
+          worker
         },
       });
       return response.data;